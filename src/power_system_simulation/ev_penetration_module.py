@@ -10,18 +10,192 @@ Authors:
     Diana Ionica
 """
 
-import json
 import math
-import random
+import multiprocessing
+import os
 
 import numpy as np
-import pandas as pd
-from power_grid_model import CalculationMethod, CalculationType, PowerGridModel, initialize_array
-from power_grid_model.utils import json_deserialize
+from power_grid_model import CalculationMethod, CalculationType
 from power_grid_model.validation import assert_valid_batch_data
 
 from power_system_simulation.graph_processor import GraphProcessor as gp
-from power_system_simulation.model_processor import line_statistics_summary, node_voltage_summary
+from power_system_simulation.model_processor import (
+    line_statistics_summary,
+    load_dataset,
+    load_metadata,
+    load_model,
+    load_profile,
+    node_voltage_summary,
+    profile_column_ids,
+    sym_load_update,
+)
+
+
+class EVPenetrationRunner:
+    """Runs EV penetration scenarios on one network and set of profiles.
+
+    Everything that does not depend on the percentage or the seed (the network, the model, the feeder of every
+    household and the available EV profiles) is prepared once, so a sweep over many scenarios only pays for the
+    random selection and the power flow of each scenario.
+
+    Args:
+        input_network_data (str): Path to the JSON file containing the power grid network data.
+        meta_data_str (str): Path to the JSON file containing metadata about the network structure.
+        active_power_profile_path (str): Path to the parquet file containing the base active power profiles.
+        ev_active_power_profile (str): Path to the parquet file containing EV charging power profiles.
+    """
+
+    def __init__(
+        self,
+        input_network_data: str,
+        meta_data_str: str,
+        active_power_profile_path: str,
+        ev_active_power_profile: str,
+    ) -> None:
+        input_metadata = load_metadata(meta_data_str)
+
+        self.input_data = load_dataset(input_network_data)
+
+        self.model = load_model(input_network_data)
+
+        self.active_power_profile_path = active_power_profile_path
+        self.ev_active_power_profile = ev_active_power_profile
+
+        line = self.input_data["line"]
+        vertex_ids = self.input_data["node"]["id"]
+        source_id = self.input_data["node"][0][0]  # or meta_data
+
+        # The edges are the lines plus the transformer between the source and the LV busbar, kept as arrays
+        edge_ids = np.concatenate([line["id"], self.input_data["transformer"]["id"]])
+        edge_vertex_id_pairs = np.column_stack(
+            [
+                np.concatenate([line["from_node"], [source_id]]),
+                np.concatenate([line["to_node"], [input_metadata["lv_busbar"]]]),
+            ]
+        )
+        edge_enabled = np.concatenate([(line["from_status"] == 1) & (line["to_status"] == 1), [True]])
+
+        grid = gp(
+            vertex_ids=vertex_ids,
+            edge_ids=edge_ids,
+            edge_vertex_id_pairs=edge_vertex_id_pairs,
+            edge_enabled=edge_enabled,
+            source_vertex_id=source_id,
+        )
+
+        # A single feeder may be given as a plain ID rather than a list, as accepted by the validation
+        feeder_ids = np.atleast_1d(input_metadata.get("lv_feeders", [])).tolist()
+        self._number_feeders = len(feeder_ids)
+        self._no_house = len(self.input_data["sym_load"])
+
+        load_ids = self.input_data["sym_load"]["id"]
+
+        # Group the sym_load positions by node once, so each feeder only touches its own nodes
+        load_order = np.argsort(self.input_data["sym_load"]["node"], kind="stable")
+        load_nodes, group_starts = np.unique(self.input_data["sym_load"]["node"][load_order], return_index=True)
+        group_bounds = np.append(group_starts, load_order.size).tolist()
+        node_to_load_positions = {
+            node: load_order[group_bounds[i] : group_bounds[i + 1]] for i, node in enumerate(load_nodes.tolist())
+        }
+
+        # Iterate thrugh the network to find downstream vertices for each feeder, chekc what houses =(sym_load)
+        # are  connected through which feeder
+        self._feeder_loads = {}
+        for feeder in feeder_ids:
+            downstream_vertices = grid.find_downstream_vertices(feeder)
+
+            positions = [node_to_load_positions[node] for node in downstream_vertices if node in node_to_load_positions]
+            # Keep the sym_load order so the seeded selection does not depend on the grouping
+            self._feeder_loads[feeder] = load_ids[np.sort(np.concatenate(positions))] if positions else load_ids[:0]
+
+        self._ev_column_ids = np.asarray(profile_column_ids(ev_active_power_profile))
+
+    def select_ev_chargers(self, percentage: float, seed: int) -> tuple[np.ndarray, list[int]]:
+        """Randomly select the households that get an EV charger and the EV profile each of them uses.
+
+        Args:
+            percentage (float): Percentage of households to be equipped with EV chargers (0-100).
+            seed (int): Random seed for reproducible EV charger distribution.
+
+        Returns:
+            tuple[np.ndarray, list[int]]: The selected sym_load ids in feeder order, and the EV profile
+                column ID assigned to each of them.
+        """
+        # One generator drives every random choice of this call
+        rng = np.random.default_rng(seed)
+
+        ev_feeder = math.floor((percentage / 100) * self._no_house / self._number_feeders)
+
+        # The selected sym_load ids of every feeder, kept as int64 arrays in feeder order
+        feeder_to_loads = dict(self._feeder_loads)
+        for feeder, matched_loads in self._feeder_loads.items():
+            if matched_loads.size:
+                # Randomly select a household that has EV charger, and making sure that
+                # we do not select more than ev_feeder households for each feeder
+                feeder_to_loads[feeder] = rng.choice(
+                    matched_loads, size=min(ev_feeder, matched_loads.size), replace=False
+                )
+
+        selected_ids = np.concatenate(list(feeder_to_loads.values()))
+
+        # Number of selected houses with EV chargers
+        num_selected = selected_ids.size
+
+        # Randomly select the profil of the EV charger
+        selected_columns = rng.choice(self._ev_column_ids, size=num_selected, replace=False).tolist()
+        return selected_ids, selected_columns
+
+    def run(self, percentage: float, seed: int, validate: bool = False, threading: int = 0) -> tuple:
+        """Simulate a single EV penetration scenario.
+
+        Args:
+            percentage (float): Percentage of households to be equipped with EV chargers (0-100).
+            seed (int): Random seed for reproducible EV charger distribution.
+            validate (bool): Run assert_valid_batch_data on the EV update before solving.
+            threading (int): Threads used by PGM to solve the timestamps in parallel, as in ev_penetration.
+
+        Returns:
+            tuple: The voltage_df and line_df summaries of the scenario, as returned by ev_penetration.
+        """
+        selected_ids, selected_columns = self.select_ev_chargers(percentage, seed)
+        return self.run_selection(selected_ids, selected_columns, validate=validate, threading=threading)
+
+    def run_selection(
+        self, selected_ids: np.ndarray, selected_columns: list[int], validate: bool = False, threading: int = 0
+    ) -> tuple:
+        """Simulate the scenario of a given selection of households and EV profiles.
+
+        Args:
+            selected_ids (np.ndarray): The sym_load ids of the households with an EV charger.
+            selected_columns (list[int]): The EV profile column ID assigned to each of these households.
+            validate (bool): Run assert_valid_batch_data on the EV update before solving.
+            threading (int): Threads used by PGM to solve the timestamps in parallel, as in ev_penetration.
+
+        Returns:
+            tuple: The voltage_df and line_df summaries of the scenario, as returned by ev_penetration.
+        """
+        # Only decode the profiles of the selected houses (sym_loads) and EV chargers
+        filtered_profile = load_profile(self.active_power_profile_path, columns=selected_ids)
+        ev_power_profile = load_profile(self.ev_active_power_profile, columns=selected_columns)
+
+        # Both profiles share the same timestamps, so the EV charging is added positionally to the selected
+        # houses (sym_loads) directly inside the update array; pandas is only kept for the timestamps
+        update_sym_load = sym_load_update(selected_ids, filtered_profile.to_numpy(dtype=np.float64))
+        update_sym_load["p_specified"] += ev_power_profile.to_numpy(dtype=np.float64)
+
+        update_data = {"sym_load": update_sym_load}
+        if validate:
+            assert_valid_batch_data(
+                input_data=self.input_data, update_data=update_data, calculation_type=CalculationType.power_flow
+            )
+        # calculate the updated power flow; the batch update is applied per scenario without touching the model
+        output_data = self.model.calculate_power_flow(
+            update_data=update_data, calculation_method=CalculationMethod.newton_raphson, threading=threading
+        )
+        # Use the developed functions to summarize the results
+        voltage_df = node_voltage_summary(output_data, filtered_profile.index)
+        line_df = line_statistics_summary(output_data, filtered_profile.index)
+        return voltage_df, line_df
 
 
 def ev_penetration(
@@ -31,12 +205,15 @@ def ev_penetration(
     ev_active_power_profile: str,
     percentage: float,
     seed: int,
+    validate: bool = False,
+    threading: int = 0,
 ) -> tuple:
     """Simulate the impact of electric vehicle (EV) penetration on a power distribution network.
 
     This function analyzes how adding EV chargers to a percentage of households affects the power grid.
     It randomly distributes EV chargers across different feeders while maintaining a balanced distribution,
-    and calculates the resulting voltage profiles and line statistics.
+    and calculates the resulting voltage profiles and line statistics. Use EVPenetrationRunner directly to run
+    many scenarios on the same network.
 
     Args:
         input_network_data (str): Path to the JSON file containing the power grid network data.
@@ -45,107 +222,66 @@ def ev_penetration(
         ev_active_power_profile (str): Path to the parquet file containing EV charging power profiles.
         percentage (float): Percentage of households to be equipped with EV chargers (0-100).
         seed (int): Random seed for reproducible EV charger distribution.
+        validate (bool): Run assert_valid_batch_data on the EV update before solving. This walks every
+            scenario in Python, so it is off by default for trusted inputs.
+        threading (int): Threads used by PGM to solve the timestamps in parallel. 0 uses all hardware threads,
+            a positive number fixes the thread count and a negative number runs sequentially.
 
     Returns:
         tuple: A tuple containing two pandas DataFrames:
             - voltage_df: Summary of node voltages across the network
             - line_df: Summary of line statistics (power flows, losses, etc.)
     """
+    runner = EVPenetrationRunner(input_network_data, meta_data_str, active_power_profile_path, ev_active_power_profile)
+    return runner.run(percentage, seed, validate=validate, threading=threading)
 
-    with open(meta_data_str, "r", encoding="utf-8") as fp_open:
-        input_metadata = json.load(fp_open)
-
-    with open(input_network_data, "r", encoding="utf-8") as fp_open:
-        input_data = json_deserialize(fp_open.read())
-
-    active_power_profile = pd.read_parquet(active_power_profile_path)
-    ev_power_profile = pd.read_parquet(ev_active_power_profile)
 
-    model = PowerGridModel(input_data=input_data)
+# The arguments of ev_penetration that define the network and profiles of a runner, in constructor order
+_RUNNER_ARGS = ("input_network_data", "meta_data_str", "active_power_profile_path", "ev_active_power_profile")
 
-    vertex_ids = input_data["node"]["id"]
-    edge_ids_init = np.array(input_data["line"]["id"])
-    edge_vertex_id_pairs_init = list(zip(input_data["line"]["from_node"], input_data["line"]["to_node"]))
-    edge_enabled_init = (np.array(input_data["line"]["from_status"]) == 1) & (
-        np.array(input_data["line"]["to_status"]) == 1
-    )
-    source_id = input_data["node"][0][0]  # or meta_data
+# The runners of a worker process, keyed by the paths of their network and profiles
+_WORKER_RUNNERS: dict[tuple[str, ...], EVPenetrationRunner] = {}
 
-    edge_ids = np.concatenate([edge_ids_init, np.array(input_data["transformer"]["id"])]).tolist()
-    edge_vertex_id_pairs = edge_vertex_id_pairs_init + [(source_id, input_metadata["lv_busbar"])]
-    edge_enabled = np.append(edge_enabled_init, True)
 
-    grid = gp(
-        vertex_ids=vertex_ids,
-        edge_ids=edge_ids,
-        edge_vertex_id_pairs=edge_vertex_id_pairs,
-        edge_enabled=edge_enabled,
-        source_vertex_id=source_id,
-    )
+def _runner_key(scenario: dict) -> tuple[str, ...]:
+    """The paths of the network and profiles of a scenario, in EVPenetrationRunner argument order"""
+    return tuple(str(scenario[name]) for name in _RUNNER_ARGS)
 
-    random.seed(seed)
 
-    number_feeders = len(input_metadata.get("lv_feeders", []))
-    no_house = len(input_data["sym_load"])
+def _init_worker(runner_keys: tuple[tuple[str, ...], ...]) -> None:
+    """Build every runner once per worker process, so every scenario the worker runs reuses its setup"""
+    for key in runner_keys:
+        _WORKER_RUNNERS[key] = EVPenetrationRunner(*key)
 
-    ev_feeder = math.floor((percentage / 100) * no_house / number_feeders)
 
-    feeder_to_loads = {feeder: [] for feeder in input_metadata["lv_feeders"]}
+def _run_scenario(scenario: dict) -> tuple:
+    """Run a single ev_penetration scenario inside a worker process, on the runner of its network"""
+    key = _runner_key(scenario)
+    if key not in _WORKER_RUNNERS:
+        _WORKER_RUNNERS[key] = EVPenetrationRunner(*key)
+    return _WORKER_RUNNERS[key].run(**{name: value for name, value in scenario.items() if name not in _RUNNER_ARGS})
 
-    selected_ids = []
 
-    # Iterate thrugh the network to find downstream vertices for each feeder, chekc what houses =(sym_load)
-    # are  connected through which feeder
+def run_ev_penetration_batch(scenarios: list[dict], n_procs: int | None = None) -> list[tuple]:
+    """Run independent EV penetration scenarios, e.g. a sweep over percentages and seeds, in parallel processes.
 
-    for feeder in input_metadata["lv_feeders"]:
-        downstream_vertices = grid.find_downstream_vertices(feeder)
-
-        matched_loads = [load["id"] for load in input_data["sym_load"] if load["node"] in downstream_vertices]
-
-        if matched_loads:
-            # Randomly select a household that has EV charger, and making sure that
-            # we do not select more than ev_feeder households for each feeder
-            selected_ids_for_feeder = random.sample(matched_loads, min(ev_feeder, len(matched_loads)))
-
-            feeder_to_loads[feeder].extend(selected_ids_for_feeder)
-
-            selected_ids.extend(selected_ids_for_feeder)
-
-    # Select the houses with EV chargers (the sym_loads) from main data
-    filtered_profile = active_power_profile.loc[:, selected_ids]
-
-    # Number of selected houses with EV chargers
-    num_selected = len(selected_ids)
-
-    # Randomly select the profil of the EV charger
-    selected_columns = random.sample(ev_power_profile.columns.tolist(), num_selected)
-
-    # Get the column of the slecetd EV charger profiles
-    selected_ev_profile = ev_power_profile[selected_columns]
-
-    # Fix the ids of the slected profiles to be equal to the ids of the slected houses(sym_loads)
-    selected_ev_profile.index = filtered_profile.index
-    # Same but with column names
-    selected_ev_profile.columns = filtered_profile.columns
-
-    # add the change thta the EV charger will cause on the sym_loads
-    summed_profile = filtered_profile.add(selected_ev_profile, fill_value=0)
+    Args:
+        scenarios (list[dict]): The keyword arguments of ev_penetration for every scenario. Unless a scenario sets
+            threading itself, its power flows run sequentially, since the scenarios already occupy the cores.
+        n_procs (int | None): Number of worker processes. Uses one per CPU core when None, and never more
+            than there are scenarios.
 
-    # Create the update array for the sym_loads
-    update_sym_load = initialize_array("update", "sym_load", summed_profile.shape)
-    update_sym_load["id"] = summed_profile.columns.to_numpy()
-    update_sym_load["p_specified"] = summed_profile.to_numpy()
+    Returns:
+        list[tuple]: The (voltage_df, line_df) result of every scenario, in the order of the scenarios.
+    """
+    if not scenarios:
+        return []
 
-    update_data = {"sym_load": update_sym_load}
-    assert_valid_batch_data(input_data=input_data, update_data=update_data, calculation_type=CalculationType.power_flow)
-    # calculate the updated power flow
-    model_2 = model.copy()
-    model_2.update(update_data=update_data)
+    scenarios = [{"threading": -1, **scenario} for scenario in scenarios]
+    n_procs = min(n_procs or os.cpu_count() or 1, len(scenarios))
 
-    output_data = model_2.calculate_power_flow(
-        update_data=update_data, calculation_method=CalculationMethod.newton_raphson
-    )
-    # Use the developed functions to summarize the results
-    voltage_df = node_voltage_summary(output_data, active_power_profile.index)
-    line_df = line_statistics_summary(output_data, active_power_profile.index)
-    return voltage_df, line_df
+    # Spawned workers start clean; the initializer builds a runner for every network once per worker, so the
+    # scenarios only pay for their selection and power flow
+    runner_keys = tuple(dict.fromkeys(_runner_key(scenario) for scenario in scenarios))
+    with multiprocessing.get_context("spawn").Pool(n_procs, initializer=_init_worker, initargs=(runner_keys,)) as pool:
+        return pool.map(_run_scenario, scenarios)
@@ -19,6 +19,7 @@ import matplotlib.pyplot as plt
 
 # import matplotlib.pyplot as plt
 import networkx as nx
+import numpy as np
 
 
 class IDNotFoundError(Exception):
@@ -46,7 +47,12 @@ class EdgeAlreadyDisabledError(Exception):
 
 
 class GraphProcessor:
-    """A class for processing undirected graphs"""
+    """A class for processing undirected graphs
+
+    The IDs, vertex pairs and enabled flags may be given as lists or as NumPy arrays,
+    with the vertex pairs as an (E, 2) array. Integer IDs are mapped to vertex indices for all pairs at once;
+    IDs of any other hashable type are looked up pair by pair.
+    """
 
     def __init__(
         self,
@@ -56,133 +62,269 @@ class GraphProcessor:
         edge_enabled: List[bool],
         source_vertex_id: int,
     ) -> None:
+        self._load_graph(vertex_ids, edge_ids, edge_vertex_id_pairs, edge_enabled, source_vertex_id)
+
+        # Store the enabled edges as CSR adjacency and root the tree at the source once,
+        # so downstream queries only visit a subtree; the same traversal checks that it is a single tree
+        self._build_csr()
+        self._root_tree()
+
+    @classmethod
+    def validate_only(
+        cls,
+        vertex_ids: List[int],
+        edge_ids: List[int],
+        edge_vertex_id_pairs: List[Tuple[int, int]],
+        edge_enabled: List[bool],
+        source_vertex_id: int,
+    ) -> None:
+        """Check that the input describes a single tree without building the structures used by the queries
+
+        Raises the same errors as the constructor, for callers that only need the validation.
+        """
+        graph = cls.__new__(cls)
+        graph._load_graph(  # pylint: disable=protected-access
+            vertex_ids, edge_ids, edge_vertex_id_pairs, edge_enabled, source_vertex_id
+        )
+        graph._build_csr()  # pylint: disable=protected-access
+        graph._check_single_tree()  # pylint: disable=protected-access
+
+    def _load_graph(
+        self,
+        vertex_ids: List[int],
+        edge_ids: List[int],
+        edge_vertex_id_pairs: List[Tuple[int, int]],
+        edge_enabled: List[bool],
+        source_vertex_id: int,
+    ) -> None:
+        """Store and check the input, and map the edges to vertex indices"""
         self.vertex_ids = vertex_ids
         self.edge_ids = edge_ids
         self.edge_vertex_id_pairs = edge_vertex_id_pairs
         self.edge_enabled = edge_enabled
         self.source_vertex_id = source_vertex_id
 
-        # Check uniqueness of vertex and edge IDs
-        if not set(vertex_ids).isdisjoint(set(edge_ids)):
+        # Map every vertex and edge ID to its position in the input lists, hashing each ID once;
+        # the maps also serve every membership test below
+        self._vertex_id_to_index = {vertex_id: index for index, vertex_id in enumerate(vertex_ids)}
+        self._edge_id_to_index = {edge_id: index for index, edge_id in enumerate(edge_ids)}
+
+        # Check uniqueness of vertex and edge IDs: a map shorter than its list means a duplicate within the list,
+        # and the key views are compared directly for IDs shared between the lists
+        if len(self._vertex_id_to_index) != len(vertex_ids):
+            raise IDNotUniqueError("Duplicate vertex ID")
+        if len(self._edge_id_to_index) != len(edge_ids) or not self._vertex_id_to_index.keys().isdisjoint(
+            self._edge_id_to_index
+        ):
             raise IDNotUniqueError("Duplicate vertex or edge ID")
 
         # Compare the length of the edge vertex ID pairs with the edge IDs
         if len(edge_vertex_id_pairs) != len(edge_ids):
             raise InputLengthDoesNotMatchError("Edge list does not match the input list")
 
-        # Check if the vertex pairs IDs are valid IDs
-        for node1, node2 in edge_vertex_id_pairs:
-            if node2 not in vertex_ids or node1 not in vertex_ids:
-                raise IDNotFoundError("Vertex ID is not valid")
+        # Vertex indices of both endpoints of every edge
+        self._edge_endpoints = self._map_edge_endpoints(vertex_ids, edge_vertex_id_pairs)
 
         # Check if the number of enabled edges is the same as the number of edge IDs
         if len(edge_enabled) != len(edge_ids):
             raise InputLengthDoesNotMatchError("Edge list does not match the input list")
 
         # Check if the source vertex ID is a valid ID
-        if source_vertex_id not in vertex_ids:
+        if source_vertex_id not in self._vertex_id_to_index:
             raise IDNotFoundError("Duplicate vertex or edge ID")
 
-        # Initialize graph
-        self._graph = nx.Graph()
-        self._graph.add_nodes_from(vertex_ids)
-
-        # Add edged to the graph
-        for edge_vertex_id_pair, enabled, edge_id in zip(edge_vertex_id_pairs, edge_enabled, edge_ids):
-            if enabled:
-                self._graph.add_edge(*edge_vertex_id_pair, id=edge_id)
+        # The enabled mask as an array
+        self._enabled_mask = np.asarray(edge_enabled, dtype=bool)
+        self._disabled_edge_indices = np.flatnonzero(~self._enabled_mask)
+
+    def _map_edge_endpoints(self, vertex_ids: List[int], edge_vertex_id_pairs: List[Tuple[int, int]]) -> np.ndarray:
+        """Map the vertex IDs of every edge to vertex indices, raising IDNotFoundError for an unknown vertex ID"""
+        vertex_array = np.asarray(vertex_ids)
+        pairs = np.asarray(edge_vertex_id_pairs)
+        if (
+            vertex_array.ndim == 1
+            and pairs.ndim == 2
+            and np.issubdtype(vertex_array.dtype, np.integer)
+            and np.issubdtype(pairs.dtype, np.integer)
+        ):
+            # Integer IDs are looked up in the sorted vertex IDs for all pairs at once; an int64 (N, 2) array
+            # of pairs is used as it is, without a copy
+            pairs = pairs.astype(np.int64, copy=False)
+            vertex_order = np.argsort(vertex_array, kind="stable")
+            sorted_vertex_ids = vertex_array[vertex_order]
+            positions = np.minimum(np.searchsorted(sorted_vertex_ids, pairs), max(len(vertex_array) - 1, 0))
+            if pairs.size and (vertex_array.size == 0 or np.any(sorted_vertex_ids[positions] != pairs)):
+                raise IDNotFoundError("Vertex ID is not valid")
+            return vertex_order[positions].astype(np.int64)
 
-        # Check if graph is connected
-        if not nx.is_connected(self._graph):
+        # Other IDs, such as strings, are looked up pair by pair in the vertex map
+        try:
+            endpoints = [
+                (self._vertex_id_to_index[vertex1], self._vertex_id_to_index[vertex2])
+                for vertex1, vertex2 in edge_vertex_id_pairs
+            ]
+        except KeyError as error:
+            raise IDNotFoundError("Vertex ID is not valid") from error
+        return np.array(endpoints, dtype=np.int64).reshape(-1, 2)
+
+    def _build_csr(self) -> None:
+        """Store the enabled edges as compressed sparse row adjacency over vertex indices"""
+        enabled_edges = np.flatnonzero(self._enabled_mask)
+        endpoints = self._edge_endpoints[enabled_edges]
+
+        # Every undirected edge is stored once in each direction
+        heads = np.concatenate([endpoints[:, 0], endpoints[:, 1]])
+        tails = np.concatenate([endpoints[:, 1], endpoints[:, 0]])
+        edges = np.concatenate([enabled_edges, enabled_edges])
+        order = np.argsort(heads, kind="stable")
+
+        # Vertex and edge indices fit in 32 bits, which halves the bytes touched per neighbour visit
+        self._indptr = np.zeros(len(self.vertex_ids) + 1, dtype=np.int32)
+        np.cumsum(np.bincount(heads, minlength=len(self.vertex_ids)), out=self._indptr[1:])
+        self._indices = tails[order].astype(np.int32)
+        self._csr_edges = edges[order].astype(np.int32)
+
+    def _root_tree(self) -> None:
+        """Root the tree at the source with a depth-first preorder in which every subtree is a contiguous slice
+
+        Raises GraphNotFullyConnectedError or GraphCycleError when the enabled edges are not a single tree.
+        """
+        indptr = self._indptr.tolist()
+        indices = self._indices.tolist()
+        csr_edges = self._csr_edges.tolist()
+        source = self._vertex_id_to_index[self.source_vertex_id]
+
+        self._parent = np.full(len(self.vertex_ids), -1, dtype=np.int64)
+        self._edge_child_endpoint = np.full(len(self.edge_ids), -1, dtype=np.int64)
+
+        preorder = []
+        visited = [False] * len(self.vertex_ids)
+        visited[source] = True
+        stack = [source]
+        while stack:
+            vertex = stack.pop()
+            preorder.append(vertex)
+            for position in range(indptr[vertex], indptr[vertex + 1]):
+                neighbour = indices[position]
+                if not visited[neighbour]:
+                    visited[neighbour] = True
+                    self._parent[neighbour] = vertex
+                    self._edge_child_endpoint[csr_edges[position]] = neighbour
+                    stack.append(neighbour)
+
+        self._raise_unless_tree(len(preorder))
+
+        # Position of every vertex in the preorder and the number of vertices in its subtree
+        self._tin = np.empty(len(self.vertex_ids), dtype=np.int64)
+        self._tin[preorder] = np.arange(len(preorder))
+        parent = self._parent.tolist()
+        subtree_size = [1] * len(self.vertex_ids)
+        for vertex in reversed(preorder[1:]):
+            subtree_size[parent[vertex]] += subtree_size[vertex]
+        self._subtree_size = np.asarray(subtree_size, dtype=np.int64)
+
+        # The preorder stored as vertex IDs, so a downstream query is a single slice; IDs that NumPy would turn
+        # into extra dimensions, such as tuples, are kept as objects
+        vertex_array = np.asarray(self.vertex_ids)
+        if vertex_array.ndim != 1:
+            vertex_array = np.fromiter(self.vertex_ids, dtype=object, count=len(self.vertex_ids))
+        self._preorder_ids = vertex_array[preorder]
+
+    def _check_single_tree(self) -> None:
+        """Raise GraphNotFullyConnectedError or GraphCycleError unless the enabled edges are a single tree"""
+        indptr = self._indptr.tolist()
+        indices = self._indices.tolist()
+        source = self._vertex_id_to_index[self.source_vertex_id]
+
+        # Count the vertices reached from the source, without recording the tree
+        visited = [False] * len(self.vertex_ids)
+        visited[source] = True
+        stack = [source]
+        n_reached = 1
+        while stack:
+            vertex = stack.pop()
+            for neighbour in indices[indptr[vertex] : indptr[vertex + 1]]:
+                if not visited[neighbour]:
+                    visited[neighbour] = True
+                    n_reached += 1
+                    stack.append(neighbour)
+
+        self._raise_unless_tree(n_reached)
+
+    def _raise_unless_tree(self, n_reached: int) -> None:
+        """Raise unless a traversal from the source that reached n_reached vertices spanned a tree"""
+        # Check if graph is connected: the traversal from the source must reach every vertex
+        if n_reached != len(self.vertex_ids):
             raise GraphNotFullyConnectedError()
 
-        # Check if the graph contains cycles
-        try:
-            nx.find_cycle(self._graph)
+        # Check if the graph contains cycles: a connected graph is a tree exactly when it has one edge
+        # less than it has vertices, so any extra enabled edge closes a cycle
+        if np.count_nonzero(self._enabled_mask) != len(self.vertex_ids) - 1:
             raise GraphCycleError()
-        except nx.NetworkXNoCycle:
-            pass
 
     def find_downstream_vertices(self, first_edge_id: int) -> List[int]:
         """Find downstream vertices"""
         # We check if the given edge ID is valid
-        if first_edge_id not in self.edge_ids:
+        if first_edge_id not in self._edge_id_to_index:
             raise IDNotFoundError()
 
         # We check if the given edge is enabled
-        index = self.edge_ids.index(first_edge_id)
+        index = self._edge_id_to_index[first_edge_id]
         if not self.edge_enabled[index]:
             return []
 
-        # We get the vertices connected to this edge
-        vertex1, vertex2 = self.edge_vertex_id_pairs[index]
+        # The downstream vertices are exactly the subtree below the child endpoint of the edge,
+        # which is a contiguous slice of the preorder
+        child = self._edge_child_endpoint[index]
+        first = self._tin[child]
 
-        # create a copy of the graph in order to remove the edge
-        graph_copy = self._graph.copy()
-        graph_copy.remove_edge(vertex1, vertex2)
+        return sorted(self._preorder_ids[first : first + self._subtree_size[child]].tolist())
 
-        # Find all the connections after the removal
-        connected = list(nx.connected_components(graph_copy))
+    def find_alternative_edges(self, disabled_edge_id: int) -> List[int]:
+        """Find alternative edges
 
-        # Find the component that contains the source vertex
-        for component in connected:
-            if self.source_vertex_id in component:
-                source_component = component
-                break
+        Lists the currently disabled edges that, when enabled after disabling the given edge,
+        make the graph fully connected and cycle-free again. Each candidate is checked in O(1)
+        against the subtree that the given edge cuts off, without rebuilding the graph.
 
-        # Return the nodes from the component that does not contain the source
-        for component in connected:
-            if component != source_component:
-                return list(component)
+        Args:
+            disabled_edge_id: ID of the enabled edge to disable.
 
-        # If both vertices still belong to the same component, return empty list
-        return []
+        Raises:
+            IDNotFoundError: If the edge ID does not exist.
+            EdgeAlreadyDisabledError: If the edge is already disabled.
 
-    def find_alternative_edges(self, disabled_edge_id: int) -> List[int]:
-        """Find alternative edges"""
+        Returns:
+            The IDs of the alternative edges, in input order.
+        """
         # We check if the given edge ID is valid
-        if disabled_edge_id not in self.edge_ids:
+        if disabled_edge_id not in self._edge_id_to_index:
             raise IDNotFoundError()
 
         # We check if the given edge ID is already disabled
-        index = self.edge_ids.index(disabled_edge_id)
+        index = self._edge_id_to_index[disabled_edge_id]
         if not self.edge_enabled[index]:
             raise EdgeAlreadyDisabledError()
 
-        # We find all the disabled edge IDs in the graph
-        disabled_edges = [self.edge_ids[i] for i, enabled in enumerate(self.edge_enabled) if not enabled]
-
-        # Empty list in case there are no alternatives to make the graph fully connected again
-        alt_list = []
-
-        # Create a dictionary with the states of all edges in the graph and disable the given edge
-        edge_status_map = dict(zip(self.edge_ids, self.edge_enabled))
-        edge_status_map[disabled_edge_id] = False
-
-        # We take all disabled edges one by one and enable them again to test for their feasbility
-        # by recreating the graph for each scenario
-        for test_edge_id in disabled_edges:
-            temp_status_map = edge_status_map.copy()
-            temp_status_map[test_edge_id] = True
-
-            temp_graph = nx.Graph()
-            temp_graph.add_nodes_from(self.vertex_ids)
-            for eid, (vertex1, vertex2) in zip(self.edge_ids, self.edge_vertex_id_pairs):
-                if temp_status_map[eid]:
-                    temp_graph.add_edge(vertex1, vertex2, id=eid)
-            # Check if the new graph is connected and check for cycles; If no cycle is found, add
-            # the edge ID to the alternative list
-            if nx.is_connected(temp_graph):
-                try:
-                    nx.find_cycle(temp_graph)
-                    has_cycle = True
-                except nx.NetworkXNoCycle:
-                    has_cycle = False
-
-                if not has_cycle:
-                    alt_list.append(test_edge_id)
-
-        return alt_list
+        # Disabling a tree edge cuts off the subtree below its child endpoint, which is the preorder
+        # interval [tin[child], tin[child] + size[child]). A disabled edge restores a connected,
+        # cycle-free graph iff exactly one of its endpoints lies inside that interval.
+        child = self._edge_child_endpoint[index]
+        first, last = self._tin[child], self._tin[child] + self._subtree_size[child]
+        endpoint_tin = self._tin[self._edge_endpoints[self._disabled_edge_indices]]
+        inside = (endpoint_tin >= first) & (endpoint_tin < last)
+        reconnecting = self._disabled_edge_indices[inside[:, 0] != inside[:, 1]]
+
+        return [self.edge_ids[edge_index] for edge_index in reconnecting.tolist()]
+
+    def _to_networkx(self) -> nx.Graph:
+        """Build a NetworkX graph of the enabled edges, used for drawing only"""
+        graph = nx.Graph()
+        graph.add_nodes_from(self.vertex_ids)
+        for (vertex1, vertex2), enabled, edge_id in zip(self.edge_vertex_id_pairs, self.edge_enabled, self.edge_ids):
+            if enabled:
+                graph.add_edge(vertex1, vertex2, id=edge_id)
+        return graph
 
     def get_figure(self, *, seed: int = 42, figsize: tuple = (6, 4)):
         """
@@ -192,18 +334,17 @@ class GraphProcessor:
         • Disabled lines → dashed red
         • Edge-ID labels for all lines
         """
-        pos = nx.spring_layout(self._graph, seed=seed)
+        graph = self._to_networkx()
+        pos = nx.spring_layout(graph, seed=seed)
         fig, ax = plt.subplots(figsize=figsize)
 
         # ── nodes ──────────────────────────────────────────────
-        nx.draw_networkx_nodes(self._graph, pos, node_color="lightsteelblue", node_size=600, ax=ax)
-        nx.draw_networkx_labels(self._graph, pos, font_size=12, font_weight="bold", ax=ax)
+        nx.draw_networkx_nodes(graph, pos, node_color="lightsteelblue", node_size=600, ax=ax)
+        nx.draw_networkx_labels(graph, pos, font_size=12, font_weight="bold", ax=ax)
 
         # ── enabled edges + labels ─────────────────────────────
-        nx.draw_networkx_edges(self._graph, pos, width=2, edge_color="gray", ax=ax)
-        nx.draw_networkx_edge_labels(
-            self._graph, pos, edge_labels=nx.get_edge_attributes(self._graph, "id"), font_size=9, ax=ax
-        )
+        nx.draw_networkx_edges(graph, pos, width=2, edge_color="gray", ax=ax)
+        nx.draw_networkx_edge_labels(graph, pos, edge_labels=nx.get_edge_attributes(graph, "id"), font_size=9, ax=ax)
 
         # ── disabled edges + labels ────────────────────────────
         disabled_triplets = [
@@ -16,8 +16,16 @@ Authors:
     Diana Ionica
 """
 
+import copy
+import functools
+import json
+import os
+
 import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
 from power_grid_model import (
     CalculationMethod,
     CalculationType,
@@ -29,6 +37,15 @@ from power_grid_model import (
 from power_grid_model.utils import json_deserialize
 from power_grid_model.validation import assert_valid_batch_data
 
+try:
+    # orjson parses JSON bytes considerably faster than the standard library; it is optional
+    from orjson import loads as _json_loads
+except ImportError:  # pragma: no cover
+    _json_loads = json.loads
+
+# Null record of a sym_load update, used to fill the fields a batch update does not set
+_SYM_LOAD_UPDATE_NULL = initialize_array(DatasetType.update, ComponentType.sym_load, 1)[0]
+
 
 class ValidationException(Exception):
     """Raised when active/reactive shapes differ."""
@@ -42,10 +59,222 @@ class TimestampMismatchError(Exception):
     """Raised when indices do not match."""
 
 
+@functools.lru_cache(maxsize=8)
+def _deserialize_dataset(model_data_path: str, mtime_ns: int) -> dict:  # pylint: disable=unused-argument
+    """Parse a PGM JSON file; the modification time only serves as part of the cache key."""
+    with open(model_data_path, encoding="utf-8") as fp:
+        return json_deserialize(fp.read())
+
+
+@functools.lru_cache(maxsize=8)
+def _read_metadata(metadata_path: str, mtime_ns: int) -> dict:  # pylint: disable=unused-argument
+    """Parse a metadata JSON file; the modification time only serves as part of the cache key."""
+    # The raw bytes are parsed directly, without decoding them to a str first
+    with open(metadata_path, "rb") as fp:
+        return _json_loads(fp.read())
+
+
+@functools.lru_cache(maxsize=8)
+def _build_model(model_data_path: str, mtime_ns: int) -> PowerGridModel:
+    """Construct a PowerGridModel from the cached dataset of a PGM JSON file."""
+    return PowerGridModel(_deserialize_dataset(model_data_path, mtime_ns))
+
+
+@functools.lru_cache(maxsize=8)
+def _read_profile(
+    profile_path: str,
+    mtime_ns: int,  # pylint: disable=unused-argument
+    columns: tuple[str, ...] | None,
+    time_range: tuple[pd.Timestamp, pd.Timestamp] | None,
+) -> pd.DataFrame:
+    """Read (a subset of) a parquet power profile; the modification time only serves as part of the cache key."""
+    time_filter = None
+    if time_range is not None:
+        # Filter on the timestamp index so row groups outside the window are skipped using their statistics
+        timestamp = ds.field(pq.read_schema(profile_path).pandas_metadata["index_columns"][0])
+        time_filter = (timestamp >= pa.scalar(time_range[0])) & (timestamp < pa.scalar(time_range[1]))
+    table = pq.read_table(
+        profile_path,
+        columns=None if columns is None else list(columns),
+        filters=time_filter,
+        use_pandas_metadata=True,
+        # Decode the column chunks on several threads and coalesce the reads of a row group up front,
+        # so the disk I/O overlaps with decompression
+        use_threads=True,
+        pre_buffer=True,
+    )
+    # Convert into a single float block so later to_numpy() calls are views, and free arrow buffers while converting
+    return table.to_pandas(self_destruct=True)
+
+
+@functools.lru_cache(maxsize=8)
+def _read_profile_column_names(profile_path: str, mtime_ns: int) -> tuple[str, ...]:  # pylint: disable=unused-argument
+    """Read the data column names from a parquet schema; the modification time only serves as part of the cache key.
+
+    A RangeIndex is stored in the pandas metadata only, as a dict instead of a column name, so it is skipped.
+    """
+    schema = pq.read_schema(profile_path)
+    pandas_metadata = schema.pandas_metadata or {}
+    index_columns = {name for name in pandas_metadata.get("index_columns", []) if isinstance(name, str)}
+    return tuple(name for name in schema.names if name not in index_columns)
+
+
+@functools.lru_cache(maxsize=8)
+def _read_timestamp_signature(
+    profile_path: str, mtime_ns: int  # pylint: disable=unused-argument
+) -> tuple[int, pd.Timestamp | None, pd.Timestamp | None]:
+    """Read the row count and timestamp range from the parquet footer; the modification time only serves as part
+    of the cache key."""
+    metadata = pq.read_metadata(profile_path)
+    schema = metadata.schema.to_arrow_schema()
+    index_name = ((schema.pandas_metadata or {}).get("index_columns") or [None])[0]
+    # A RangeIndex is not stored as a column, so there is no range to read
+    if not isinstance(index_name, str):
+        return metadata.num_rows, None, None
+    index_column = schema.get_field_index(index_name)
+    statistics = [metadata.row_group(i).column(index_column).statistics for i in range(metadata.num_row_groups)]
+    # Without statistics in every row group the range is unknown
+    if not statistics or any(stats is None or not stats.has_min_max for stats in statistics):
+        return metadata.num_rows, None, None
+    return (
+        metadata.num_rows,
+        pd.Timestamp(min(stats.min for stats in statistics)),
+        pd.Timestamp(max(stats.max for stats in statistics)),
+    )
+
+
+def load_dataset(model_data_path: str, read_only: bool = False) -> dict:
+    """
+    Loads a static PGM model from JSON, reusing the parsed data while the file is unchanged.
+
+    Args:
+        model_data_path (str): Path to the static model JSON file.
+        read_only (bool): Return the cached dataset itself instead of a copy of every component array. It is
+            shared with every other caller, so it must not be modified.
+
+    Returns:
+        dict: The deserialized dataset; unless read_only is set, a fresh copy that the caller is free to modify.
+    """
+    path = str(model_data_path)
+    dataset = _deserialize_dataset(path, os.stat(path).st_mtime_ns)
+    if read_only:
+        return dataset
+    return {component: data.copy() for component, data in dataset.items()}
+
+
+def load_metadata(metadata_path: str) -> dict:
+    """
+    Loads a network metadata JSON file, reusing the parsed data while the file is unchanged.
+
+    Args:
+        metadata_path (str): Path to the metadata JSON file.
+
+    Returns:
+        dict: A fresh copy of the metadata that the caller is free to modify.
+    """
+    path = str(metadata_path)
+    return copy.deepcopy(_read_metadata(path, os.stat(path).st_mtime_ns))
+
+
+def load_model(model_data_path: str) -> PowerGridModel:
+    """
+    Builds a PowerGridModel for a static model JSON file, reusing the constructed model while the file is unchanged.
+
+    The model is shared between callers. Batch calculations with update_data leave it untouched;
+    call .copy() on the result before applying a permanent update() to it.
+
+    Args:
+        model_data_path (str): Path to the static model JSON file.
+
+    Returns:
+        PowerGridModel: The cached model.
+    """
+    path = str(model_data_path)
+    return _build_model(path, os.stat(path).st_mtime_ns)
+
+
+def load_profile(
+    profile_path: str,
+    columns: list[int] | None = None,
+    time_range: tuple[pd.Timestamp, pd.Timestamp] | None = None,
+) -> pd.DataFrame:
+    """
+    Loads a parquet power profile, reusing the decoded frame while the file is unchanged.
+
+    The cached frame itself is returned, so repeated loads neither decode nor copy it. It is shared with every
+    other caller and must be treated as read-only; copy it before modifying it.
+
+    Args:
+        profile_path (str): Path to the parquet file.
+        columns (list[int] | None): IDs of the columns to read, in the requested order. Only these columns
+            are decoded; the timestamp index is always included, so an empty list only reads the timestamps.
+            Reads all columns when None.
+        time_range (tuple[pd.Timestamp, pd.Timestamp] | None): Only read the rows with start <= timestamp < end.
+            Reads all rows when None.
+
+    Returns:
+        pd.DataFrame: The cached profile, read-only.
+    """
+    path = str(profile_path)
+    column_names = None if columns is None else tuple(str(column) for column in columns)
+    if time_range is not None:
+        time_range = (pd.Timestamp(time_range[0]), pd.Timestamp(time_range[1]))
+    return _read_profile(path, os.stat(path).st_mtime_ns, column_names, time_range)
+
+
+def _profile_column_names(profile_path: str) -> tuple[str, ...]:
+    """Read the data column names of a parquet power profile, reusing them while the file is unchanged"""
+    path = str(profile_path)
+    return _read_profile_column_names(path, os.stat(path).st_mtime_ns)
+
+
+def profile_column_ids(profile_path: str) -> list[int]:
+    """
+    Reads the column IDs of a parquet power profile from its schema without decoding any data.
+
+    Args:
+        profile_path (str): Path to the parquet file.
+
+    Returns:
+        list[int]: The column IDs in file order, excluding the timestamp index.
+    """
+    return [int(name) for name in _profile_column_names(profile_path)]
+
+
+def profile_column_count(profile_path: str) -> int:
+    """
+    Counts the data columns of a parquet power profile from its schema, without interpreting their names.
+
+    Args:
+        profile_path (str): Path to the parquet file.
+
+    Returns:
+        int: The number of columns, excluding the timestamp index.
+    """
+    return len(_profile_column_names(profile_path))
+
+
+def profile_timestamp_signature(profile_path: str) -> tuple[int, pd.Timestamp | None, pd.Timestamp | None]:
+    """
+    Reads the number of timestamps and their range from the parquet metadata without decoding any data.
+
+    Args:
+        profile_path (str): Path to the parquet file.
+
+    Returns:
+        tuple[int, pd.Timestamp | None, pd.Timestamp | None]: The number of rows and the first and last timestamp,
+            taken from the row group statistics. The timestamps are None when the file has no statistics for them.
+    """
+    path = str(profile_path)
+    return _read_timestamp_signature(path, os.stat(path).st_mtime_ns)
+
+
 def load_input_data(
     active_data_path: str,
     reactive_data_path: str,
     model_data_path: str,
+    columns: list[int] | None = None,
+    time_range: tuple[pd.Timestamp, pd.Timestamp] | None = None,
 ) -> tuple[pd.DataFrame, pd.DataFrame, dict]:
     """
     Loads and validates input data required for a power flow simulation.
@@ -57,18 +286,21 @@ def load_input_data(
         active_data_path (str): Path to the active power parquet file.
         reactive_data_path (str): Path to the reactive power parquet file.
         model_data_path (str): Path to the static model JSON file.
+        columns (list[int] | None): Only read the profiles of these sym_load IDs. Reads all columns when None.
+        time_range (tuple[pd.Timestamp, pd.Timestamp] | None): Only read the rows with start <= timestamp < end.
+            Reads all rows when None.
 
     Returns:
         tuple[pd.DataFrame, pd.DataFrame, dict]: A tuple containing:
-            - active_df: DataFrame of active power values.
-            - reactive_df: DataFrame of reactive power values.
+            - active_df: DataFrame of active power values, a copy that the caller is free to modify.
+            - reactive_df: DataFrame of reactive power values, a copy that the caller is free to modify.
             - dataset: Dictionary representing the deserialized static model.
     """
-    with open(model_data_path, encoding="utf-8") as fp:
-        dataset = json_deserialize(fp.read())
+    dataset = load_dataset(model_data_path)
 
-    active_df = pd.read_parquet(active_data_path, engine="pyarrow")
-    reactive_df = pd.read_parquet(reactive_data_path, engine="pyarrow")
+    # Copies of the cached profiles, as the callers of this function may modify them
+    active_df = load_profile(active_data_path, columns, time_range).copy()
+    reactive_df = load_profile(reactive_data_path, columns, time_range).copy()
 
     if active_df.shape != reactive_df.shape:
         raise ValidationException("Active and reactive data must have the same shape.")
@@ -80,42 +312,74 @@ def load_input_data(
     return active_df, reactive_df, dataset
 
 
+def sym_load_update(
+    load_ids: np.ndarray,
+    p_specified: np.ndarray,
+    q_specified: np.ndarray | None = None,
+) -> np.ndarray:
+    """
+    Builds a sym_load batch update array, writing every field exactly once.
+
+    The array is allocated uninitialized; fields that are not given are set to the PGM null value,
+    so the corresponding input data of the model stays unchanged.
+
+    Args:
+        load_ids (np.ndarray): IDs of the updated sym_loads, one per column.
+        p_specified (np.ndarray): Active power per timestamp (rows) and sym_load (columns).
+        q_specified (np.ndarray | None): Reactive power with the same shape, or None to keep the input value.
+
+    Returns:
+        np.ndarray: The sym_load update array with the shape of p_specified.
+    """
+    update_data = initialize_array(DatasetType.update, ComponentType.sym_load, p_specified.shape, empty=True)
+    update_data["id"] = load_ids
+    update_data["status"] = _SYM_LOAD_UPDATE_NULL["status"]
+    np.copyto(update_data["p_specified"], p_specified)
+    np.copyto(update_data["q_specified"], _SYM_LOAD_UPDATE_NULL["q_specified"] if q_specified is None else q_specified)
+    return update_data
+
+
 def run_updated_power_flow_analysis(
     active_df: pd.DataFrame,
     reactive_df: pd.DataFrame,
     dataset: dict,
+    validate: bool = False,
+    threading: int = 0,
 ) -> dict:
     """
     Executes a power flow simulation using the Newton-Raphson method.
 
-    Builds an update model with active and reactive power inputs, validates the setup,
+    Builds an update model with active and reactive power inputs, optionally validates the setup,
     and runs the solver on the given dataset.
 
     Args:
         active_df (pd.DataFrame): DataFrame of active power values indexed by timestamp.
         reactive_df (pd.DataFrame): DataFrame of reactive power values indexed by timestamp.
         dataset (dict): Static model data for the power grid.
+        validate (bool): Run assert_valid_batch_data before solving. This walks every scenario in Python,
+            which can cost as much as the calculation itself, so it is off by default for trusted inputs.
+        threading (int): Threads used by PGM to solve the timestamps in parallel. 0 uses all hardware threads,
+            a positive number fixes the thread count and a negative number runs sequentially.
 
     Returns:
         dict: Simulation output dictionary containing computed values for each grid component.
     """
-    update_data = initialize_array(DatasetType.update, ComponentType.sym_load, active_df.shape)
-    update_data["id"] = active_df.columns.to_numpy()
-    update_data["p_specified"] = active_df.to_numpy()
-    update_data["q_specified"] = reactive_df.to_numpy()
+    update_data = sym_load_update(active_df.columns.to_numpy(), active_df.to_numpy(), reactive_df.to_numpy())
 
     update_model = {ComponentType.sym_load: update_data}
 
     model = PowerGridModel(dataset)
-    assert_valid_batch_data(
-        input_data=dataset,
-        update_data=update_model,
-        calculation_type=CalculationType.power_flow,
-    )
+    if validate:
+        assert_valid_batch_data(
+            input_data=dataset,
+            update_data=update_model,
+            calculation_type=CalculationType.power_flow,
+        )
 
     return model.calculate_power_flow(
         calculation_method=CalculationMethod.newton_raphson,
         update_data=update_model,
+        threading=threading,
     )
 
 
@@ -139,10 +403,13 @@ def node_voltage_summary(output: dict, timestamps: pd.Index) -> pd.DataFrame:
     node_voltages = output[ComponentType.node]["u_pu"]
     ids = output[ComponentType.node]["id"][0]
 
-    max_v = np.max(node_voltages, axis=1)
-    min_v = np.min(node_voltages, axis=1)
-    max_ids = ids[np.argmax(node_voltages, axis=1)]
-    min_ids = ids[np.argmin(node_voltages, axis=1)]
+    # Locate the extremes once and gather the values at those positions
+    max_idx = np.argmax(node_voltages, axis=1)
+    min_idx = np.argmin(node_voltages, axis=1)
+    max_v = np.take_along_axis(node_voltages, max_idx[:, None], axis=1).ravel()
+    min_v = np.take_along_axis(node_voltages, min_idx[:, None], axis=1).ravel()
+    max_ids = ids[max_idx]
+    min_ids = ids[min_idx]
 
     return pd.DataFrame(
         {
@@ -159,7 +426,9 @@ def line_statistics_summary(output: dict, timestamps: pd.Index) -> pd.DataFrame:
     """
     Computes per-line statistics from simulation output including loss and loading metrics.
 
-    Calculates energy losses over time and identifies max/min loadings with associated timestamps.
+    Calculates energy losses by integrating the line losses over the elapsed time in hours
+    and identifies max/min loadings with associated timestamps. The losses are energy in kWh rather than
+    a sum over the timestamp steps, so for 15-minute profiles they are a quarter of the per-step sum.
 
     Args:
         output (dict): The updated model.
@@ -167,24 +436,29 @@ def line_statistics_summary(output: dict, timestamps: pd.Index) -> pd.DataFrame:
 
     Returns:
         pd.DataFrame: Summary DataFrame indexed by line IDs, including:
-            - Total_Loss (kWh)
+            - Total_Loss (kWh, the trapezoidal integral of the losses over the elapsed hours)
             - Max_Loading
             - Max_Loading_Timestamp
             - Min_Loading
             - Min_Loading_Timestamp
     """
     lines = output[ComponentType.line]
-    load = output[ComponentType.line]["loading"].T
-    p_to = output[ComponentType.line]["p_to"].T
-    p_from = output[ComponentType.line]["p_from"].T
-
-    loss_energy = np.abs(p_to + p_from)
-    total_loss = np.trapezoid(loss_energy, axis=1) / 1000  # kWh if p in kW
-
-    max_load = np.max(load, axis=1)
-    min_load = np.min(load, axis=1)
-    ts_max = timestamps[np.argmax(load, axis=1)]
-    ts_min = timestamps[np.argmin(load, axis=1)]
+    # Arrays are (timestamps, lines); reduce over axis 0 instead of transposing
+    load = lines["loading"]
+
+    # Integrate over the real elapsed time in hours so non-uniform timestamps are handled correctly
+    hours = np.asarray((timestamps - timestamps[0]) / pd.Timedelta(hours=1), dtype=np.float64)
+    # The sum is a fresh array, so take its absolute value in place instead of allocating another (T, L) array
+    loss_power = lines["p_to"] + lines["p_from"]
+    np.abs(loss_power, out=loss_power)
+    total_loss = np.trapezoid(loss_power, x=hours, axis=0) / 1000  # Wh -> kWh
+
+    max_idx = np.argmax(load, axis=0)
+    min_idx = np.argmin(load, axis=0)
+    max_load = np.take_along_axis(load, max_idx[None, :], axis=0).ravel()
+    min_load = np.take_along_axis(load, min_idx[None, :], axis=0).ravel()
+    ts_max = timestamps[max_idx]
+    ts_min = timestamps[min_idx]
 
     line_df = pd.DataFrame(
         {
@@ -194,9 +468,8 @@ def line_statistics_summary(output: dict, timestamps: pd.Index) -> pd.DataFrame:
             "Min_Loading": min_load,
             "Min_Loading_Timestamp": ts_min,
         },
-        index=lines["id"][0],
+        index=pd.Index(lines["id"][0], name="Line_ID"),
     )
-    line_df.index.name = "Line_ID"
     return line_df
 
 
@@ -16,13 +16,11 @@ Authors:
     Diana Ionica
 """
 
-import copy
-import json
-from datetime import datetime, timedelta
+from datetime import datetime
 
 import numpy as np
 import pandas as pd
-from power_grid_model import ComponentType
+from power_grid_model import CalculationMethod, ComponentType, DatasetType, PowerGridModel, initialize_array
 
 from power_system_simulation import model_processor as calc
 from power_system_simulation.graph_processor import GraphProcessor as gp
@@ -46,6 +44,7 @@ def nm_function(
     metadata_path: str,
     active_power_profile_path: str,
     reactive_power_profile_path: str,
+    threading: int = 0,
 ) -> list[int]:
     """
     Analyze network modification impact by finding alternative line configurations.
@@ -64,6 +63,8 @@ def nm_function(
         metadata_path (str): Path to metadata containing transformer connections.
         active_power_profile_path (str): CSV file for active power time series.
         reactive_power_profile_path (str): CSV file for reactive power time series.
+        threading (int): Threads used by PGM to solve the alternatives and timestamps in parallel. 0 uses all
+            hardware threads, a positive number fixes the thread count and a negative number runs sequentially.
 
     Returns:
         pd.DataFrame: A DataFrame with columns:
@@ -80,25 +81,25 @@ def nm_function(
         model_data_path=input_data_path,
     )
 
-    with open(metadata_path, encoding="utf-8") as fp:
-        meta_data = json.load(fp)
+    meta_data = calc.load_metadata(metadata_path)
 
-    vertex_ids = input_data[ComponentType.node]["id"].tolist()
+    # GraphProcessor accepts the ID arrays directly, so they are not converted to Python lists
+    vertex_ids = input_data[ComponentType.node]["id"]
 
-    edge_ids_init = input_data[ComponentType.line]["id"].tolist()
+    edge_ids_init = input_data[ComponentType.line]["id"]
     edge_vertex_id_pairs_init = list(
         zip(input_data[ComponentType.line]["from_node"], input_data[ComponentType.line]["to_node"])
     )
 
-    edge_enabled_init = (np.array(input_data[ComponentType.line]["from_status"]) == 1) & (
-        np.array(input_data[ComponentType.line]["to_status"]) == 1
-    ).tolist()
+    edge_enabled_init = (input_data[ComponentType.line]["from_status"] == 1) & (
+        input_data[ComponentType.line]["to_status"] == 1
+    )
     source_id = input_data[ComponentType.node][0][0].item()
 
-    edge_ids = np.concatenate([edge_ids_init, np.array(input_data[ComponentType.transformer]["id"])]).tolist()
+    edge_ids = np.concatenate([edge_ids_init, input_data[ComponentType.transformer]["id"]])
     edge_vertex_id_pairs = edge_vertex_id_pairs_init + [(source_id, meta_data["lv_busbar"])]
 
-    edge_enabled = (np.append(edge_enabled_init, True)).tolist()
+    edge_enabled = np.append(edge_enabled_init, True)
 
     gra = gp(
         vertex_ids=vertex_ids,
@@ -111,47 +112,64 @@ def nm_function(
     if not isinstance(given_lineid, int):
         raise IDNotInt("The inserted line ID is not valid")
 
-    if given_lineid not in input_data["line"]["id"]:
+    # Row of every line ID, so the given line is looked up once instead of scanning the ID array per access
+    line_index = {line_id: index for index, line_id in enumerate(input_data["line"]["id"].tolist())}
+
+    if given_lineid not in line_index:
         raise IDNotFoundError("The ID is not in the data!")
 
-    from_status = input_data["line"]["from_status"][input_data["line"]["id"] == given_lineid]
-    to_status = input_data["line"]["to_status"][input_data["line"]["id"] == given_lineid]
+    given_index = line_index[given_lineid]
+    from_status = input_data["line"]["from_status"][given_index]
+    to_status = input_data["line"]["to_status"][given_index]
 
     if from_status == 0 or to_status == 0:
         raise LineIDNotConnectedOnBothSides("The inserted line ID is not connected at both sides")
 
     alt_list = gra.find_alternative_edges(given_lineid)
 
-    rows = []
-
-    date_list = [datetime(2024, 1, 1) + timedelta(minutes=i * 15) for i in range(active_power.shape[0])]
-
-    for alt_id in alt_list:
-        new_data = copy.deepcopy(input_data)
-
-        new_data["line"]["to_status"][new_data["line"]["id"] == alt_id] = 1
-        new_data["line"]["to_status"][new_data["line"]["id"] == given_lineid] = 0
-        new_data["line"]["from_status"][new_data["line"]["id"] == given_lineid] = 0
-
-        output_data = calc.run_updated_power_flow_analysis(active_power, reactive_power, new_data)
-
-        line_loading = output_data["line"]["loading"]
-        # Get position in the array
-        max_idx = np.argmax(line_loading)
-        row, col = np.unravel_index(max_idx, line_loading.shape)
+    # input_data is our own copy, so the contingency line is disconnected in the model data itself,
+    # which takes it out of service in every scenario
+    input_data["line"]["to_status"][given_index] = 0
+    input_data["line"]["from_status"][given_index] = 0
 
-        # Get max value and its id and the timestamp
+    if not alt_list:
+        return pd.DataFrame(columns=["Alternative ID", "Max Loading", "ID_max", "Timestamp_max"])
 
-        max_line_load = line_loading[row, col]
+    n_alt = len(alt_list)
+    n_timestamps = active_power.shape[0]
+    date_array = pd.date_range(datetime(2024, 1, 1), periods=n_timestamps, freq="15min")
 
-        max_line_load_id = output_data["line"]["id"][row, col]
-
-        # The given line  repeats each timestamp so i have to
-        # find whihc row(which timestamp) corresponds to this one
-
-        timestamp_max = date_list[row]
-
-        rows.append([alt_id, max_line_load, max_line_load_id, timestamp_max])
-
-    return_df = pd.DataFrame(rows, columns=["Alternative ID", "Max Loading", "ID_max", "Timestamp_max"])
+    # Solve all alternatives in one batch: scenario alt_position * n_timestamps + t is timestamp t
+    # with the alternative line connected, so the model is built only once
+    load_update = calc.sym_load_update(
+        active_power.columns.to_numpy(),
+        np.tile(active_power.to_numpy(), (n_alt, 1)),
+        np.tile(reactive_power.to_numpy(), (n_alt, 1)),
+    )
+    line_update = initialize_array(DatasetType.update, ComponentType.line, (n_alt * n_timestamps, 1))
+    line_update["id"] = np.repeat(alt_list, n_timestamps)[:, None]
+    line_update["to_status"] = 1
+
+    output_data = PowerGridModel(input_data).calculate_power_flow(
+        update_data={ComponentType.sym_load: load_update, ComponentType.line: line_update},
+        calculation_method=CalculationMethod.newton_raphson,
+        threading=threading,
+    )
+    line_loading = output_data["line"]["loading"].reshape(n_alt, n_timestamps, -1)
+    line_ids = output_data["line"]["id"].reshape(n_alt, n_timestamps, -1)
+
+    # Locate the max loading of every alternative at once: the flat argmax per alternative is split
+    # into the timestamp (row) and the line (col) where it occurs
+    max_idx = line_loading.reshape(n_alt, -1).argmax(axis=1)
+    rows, cols = np.unravel_index(max_idx, line_loading.shape[1:])
+    alt_positions = np.arange(n_alt)
+
+    return_df = pd.DataFrame(
+        {
+            "Alternative ID": alt_list,
+            "Max Loading": line_loading[alt_positions, rows, cols],
+            "ID_max": line_ids[alt_positions, rows, cols],
+            "Timestamp_max": date_array[rows],
+        }
+    )
     return return_df
@@ -16,9 +16,9 @@ Authors:
     Diana Ionica
 """
 
-from pathlib import Path
-
-from power_grid_model.utils import json_serialize_to_file
+import numpy as np
+import pandas as pd
+from power_grid_model import CalculationMethod, ComponentType, DatasetType, PowerGridModel, initialize_array
 
 from power_system_simulation import model_processor as calc
 
@@ -27,17 +27,85 @@ class InvalidOptimizeInput(Exception):
     """Exception raised when user inputs an invalid optimize_by value."""
 
 
+def _evaluate_tap_positions(
+    model: PowerGridModel,
+    transformer_id: int,
+    active_power_df: pd.DataFrame,
+    reactive_power_df: pd.DataFrame,
+    tap_positions: np.ndarray,
+    optimize_by: int,
+    threading: int = 0,
+) -> np.ndarray:
+    """
+    Solves the time series for the given tap positions in one batch and evaluates the selected metric for each.
+
+    Args:
+        model (PowerGridModel): The model of the network; batch calculations leave it unchanged.
+        transformer_id (int): ID of the transformer whose tap position is varied.
+        active_power_df (pd.DataFrame): Active power per timestamp (rows) and sym_load (columns).
+        reactive_power_df (pd.DataFrame): Reactive power with the same shape.
+        tap_positions (np.ndarray): The tap positions to evaluate.
+        optimize_by (int): 0 for the total losses, 1 for the voltage deviation.
+        threading (int): Threads used by PGM to solve the scenarios in parallel, as in optimal_tap_position.
+
+    Returns:
+        np.ndarray: The metric of every tap position, in the order of tap_positions.
+    """
+    n_taps = len(tap_positions)
+    n_timestamps = active_power_df.shape[0]
+
+    # Scenario tap_index * n_timestamps + t is timestamp t at that tap position
+    load_update = calc.sym_load_update(
+        active_power_df.columns.to_numpy(),
+        np.tile(active_power_df.to_numpy(), (n_taps, 1)),
+        np.tile(reactive_power_df.to_numpy(), (n_taps, 1)),
+    )
+    tap_update = initialize_array(DatasetType.update, ComponentType.transformer, (n_taps * n_timestamps, 1))
+    tap_update["id"] = transformer_id
+    tap_update["tap_pos"] = np.repeat(tap_positions, n_timestamps)[:, None]
+
+    output_data = model.calculate_power_flow(
+        update_data={ComponentType.sym_load: load_update, ComponentType.transformer: tap_update},
+        calculation_method=CalculationMethod.newton_raphson,
+        threading=threading,
+    )
+
+    metric = np.empty(n_taps)
+    for tap_index in range(n_taps):
+        # The results of a single tap position are a contiguous block of scenarios
+        tap_output = {
+            component: result[tap_index * n_timestamps : (tap_index + 1) * n_timestamps]
+            for component, result in output_data.items()
+        }
+        if optimize_by == 0:
+            losses_summary = calc.line_statistics_summary(tap_output, reactive_power_df.index)
+            metric[tap_index] = losses_summary["Total_Loss"].sum()
+        else:
+            voltage_summary = calc.node_voltage_summary(tap_output, reactive_power_df.index)
+            metric[tap_index] = (voltage_summary["Max_Voltage_Node"] - 1).abs().mean()
+    return metric
+
+
 def optimal_tap_position(
-    input_network_data: str, active_power_profile_path: str, reactive_power_profile_path: str, optimize_by: int
+    input_network_data: str,
+    active_power_profile_path: str,
+    reactive_power_profile_path: str,
+    optimize_by: int,
+    threading: int = 0,
 ) -> int:
     """
     Calculates the optimal transformer tap position based on user-defined optimization metric.
 
+    Only the selected metric is evaluated. Every tap position is solved for the whole time series in a single
+    batch calculation, and on equal metrics the first tap position of the sweep is returned.
+
     Args:
         input_network_data (str): Path to the network data file.
         active_power_profile_path (str): Path to the active power profile file.
         reactive_power_profile_path (str): Path to the reactive power profile file.
         optimize_by (int): 0 for minimizing total losses, 1 for minimizing voltage deviation.
+        threading (int): Threads used by PGM to solve the tap positions and timestamps in parallel. 0 uses all
+            hardware threads, a positive number fixes the thread count and a negative number runs sequentially.
 
     Raises:
         InvalidOptimizeInput: If optimize_by is not 0 or 1.
@@ -53,49 +121,24 @@ def optimal_tap_position(
         active_power_profile_path, reactive_power_profile_path, input_network_data
     )
 
-    path_input_network_data_temp = Path(input_network_data).parent / "input_network_data_temp.json"
-
     pos_min = input_network_data_dict["transformer"]["tap_min"][0]
     pos_max = input_network_data_dict["transformer"]["tap_max"][0]
 
-    total_losses_min = float("inf")
-    average_dev_max_node_min = float("inf")
-    total_losses_min_tap_pos = pos_max
-    average_dev_min_tap_pos = pos_max
-
-    for tap_pos in range(pos_max, pos_min + 1):
-        input_network_data_dict["transformer"]["tap_pos"] = tap_pos
-        json_serialize_to_file(path_input_network_data_temp, input_network_data_dict)
-
-        result_power_flow_analysis = calc.run_updated_power_flow_analysis(
-            active_power_df, reactive_power_df, input_network_data_dict
-        )
-        voltage_summary = calc.node_voltage_summary(result_power_flow_analysis, reactive_power_df.index)
-        losses_summary = calc.line_statistics_summary(result_power_flow_analysis, reactive_power_df.index)
-
-        average_dev_max_node = (voltage_summary["Max_Voltage_Node"] - 1).abs().mean()
-        # total_losses = losses_summary["Total_Loss"].sum()
-
-        if tap_pos == pos_max:
-            total_losses = losses_summary["Total_Loss"].sum()
-            total_losses_min = total_losses
-            total_losses_min_tap_pos = tap_pos
-            average_dev_max_node_min = average_dev_max_node
-            average_dev_min_tap_pos = tap_pos
-        else:
-
-            if total_losses < total_losses_min:
-                total_losses_min = total_losses
-                total_losses_min_tap_pos = tap_pos
-
-            if average_dev_max_node < average_dev_max_node_min:
-                average_dev_max_node_min = average_dev_max_node
-                average_dev_min_tap_pos = tap_pos
-
-    if optimize_by == 0:
-        return total_losses_min_tap_pos
-
-    if optimize_by == 1:
-        return average_dev_min_tap_pos
-
-    return
+    # Sweep from tap_max towards tap_min; on equal metrics the first tap position of the sweep is kept
+    step = 1 if pos_min >= pos_max else -1
+    tap_positions = np.arange(pos_max, pos_min + step, step)
+
+    # All tap positions are solved in one batch calculation, which leaves the model unchanged
+    model = PowerGridModel(input_network_data_dict)
+
+    metric = _evaluate_tap_positions(
+        model,
+        input_network_data_dict["transformer"]["id"][0],
+        active_power_df,
+        reactive_power_df,
+        tap_positions,
+        optimize_by,
+        threading,
+    )
+    # np.argmin returns the first of equal minima
+    return int(tap_positions[np.argmin(metric)])
@@ -24,11 +24,12 @@ Authors:
 
 
 # Load dependencies and functions from graph_processing
-import json
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
 
 import numpy as np
-
-# Load dependencies and functions from calculation_module
 import pandas as pd
 from power_grid_model import CalculationType
 from power_grid_model.utils import json_deserialize
@@ -36,6 +37,15 @@ from power_grid_model.validation import assert_valid_input_data
 
 from power_system_simulation.graph_processor import GraphProcessor as graph
 
+# Load dependencies and functions from calculation_module
+from power_system_simulation.model_processor import (
+    load_dataset,
+    load_metadata,
+    load_profile,
+    profile_column_count,
+    profile_timestamp_signature,
+)
+
 
 class TooManyTransformers(Exception):
     """There are more than one Transformers in the system"""
@@ -65,6 +75,59 @@ class LoadIdsDoNotMatchError(Exception):
     """Exception raised when Load IDs of active and reactive power profiles do not match."""
 
 
+@functools.lru_cache(maxsize=8)
+def _assert_valid_input_file(
+    input_network_data: str, mtime_ns: int, size: int  # pylint: disable=unused-argument
+) -> None:
+    """Validate a PGM input file for power flow; only files that passed are cached, so invalid ones raise again.
+
+    The modification time and size only serve as the cache key, so a rewrite within the resolution
+    of the file system clock is still noticed when it changes the size.
+    """
+    # The validation only reads the data, so it runs on the cached dataset without copying it
+    assert_valid_input_data(
+        input_data=load_dataset(input_network_data, read_only=True), calculation_type=CalculationType.power_flow
+    )
+
+
+def _load_network(input_network_data: Optional[str], input_network_json: Optional[str]) -> dict:
+    """Load the network data from the JSON string if given, otherwise from the file; the data is only read"""
+    if input_network_json is None:
+        return load_dataset(input_network_data, read_only=True)
+    return json_deserialize(input_network_json)
+
+
+def _is_single_id(value: object) -> bool:
+    """Check that a metadata entry is a single integer ID rather than a list of IDs or a bool"""
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _read_timestamps(profile_path: str) -> pd.Index:
+    """Read only the timestamp index of a power profile"""
+    return load_profile(profile_path, columns=[]).index
+
+
+def _signatures_may_match(*signatures: tuple[int, pd.Timestamp | None, pd.Timestamp | None]) -> bool:
+    """Check whether profiles can share their timestamps, by their row counts and the ranges that are known"""
+    if len({num_rows for num_rows, _, _ in signatures}) > 1:
+        return False
+    # A profile without statistics has an unknown range, which only the decoded timestamps can settle
+    return len({(first, last) for _, first, last in signatures if first is not None}) <= 1
+
+
+def _timestamps_equal(first: pd.Index, second: pd.Index) -> bool:
+    """Compare two timestamp indexes, deciding in constant time whenever the lengths, endpoints or frequency allow"""
+    if len(first) != len(second):
+        return False
+    if len(first) and (first[0] != second[0] or first[-1] != second[-1]):
+        return False
+    # Two regular indexes with the same start, length and frequency hold the same timestamps
+    first_freq = getattr(first, "freq", None)
+    if first_freq is not None and first_freq == getattr(second, "freq", None):
+        return True
+    return first.equals(second)
+
+
 class ValidatePowerSystemSimulation:
     """Power System Validation Class.
 
@@ -82,11 +145,12 @@ class ValidatePowerSystemSimulation:
     - EV charging profile sufficiency
 
     Args:
-        input_network_data (str): Path to the network data JSON file
+        input_network_data (str): Path to the network data JSON file; not read when input_network_json is given
         meta_data_str (str): Path to the metadata JSON file
         ev_active_power_profile (str): Path to the EV power profile parquet file
         active_power_profile (str): Path to the active power profile parquet file
         reactive_power_profile (str): Path to the reactive power profile parquet file
+        input_network_json (str, optional): The network data as a JSON string, validated instead of the file
 
     Raises:
         TooManyTransformers: If more than one transformer is found
@@ -98,94 +162,115 @@ class ValidatePowerSystemSimulation:
         TooFewEVs: If there are fewer EV profiles than loads
         GraphNotFullyConnectedError: If the grid is not fully connected
         GraphCycleError: If the grid contains cycles
+        ValueError: If neither input_network_data nor input_network_json is given
     """
 
     def __init__(
         self,
-        input_network_data: str,
+        input_network_data: Optional[str],
         meta_data_str: str,
         ev_active_power_profile: str,
         active_power_profile: str,
         reactive_power_profile: str,
+        input_network_json: Optional[str] = None,
     ):
         # Do power flow calculations with validity checks
-        # Read and load input data
-
-        ev_power_profile = pd.read_parquet(ev_active_power_profile)
-        active_profile = pd.read_parquet(active_power_profile)
-        reactive_profile = pd.read_parquet(reactive_power_profile)
-
-        # Specify the encoding explicitly when opening the files
-        with open(meta_data_str, "r", encoding="utf-8") as fp:
-            meta_data = json.load(fp)
+        if input_network_data is None and input_network_json is None:
+            raise ValueError("Either input_network_data or input_network_json must be given")
 
-        with open(input_network_data, "r", encoding="utf-8") as fp:
-            input_data = json_deserialize(fp.read())
-
-        # The LV grid should be a valid PGM input data -> Validate data for PGM
-        assert_valid_input_data(input_data=input_data, calculation_type=CalculationType.power_flow)
-
-        # Ensure there is only one transformer in the LV grid -> Check if "transformer" in meta_data is not an int
-        if not isinstance(meta_data["transformer"], int):
-            raise TooManyTransformers("Multiple transformers found in input data")
-
-        # Ensure there is only one source in the LV grid -> Check if "source" in meta_data is not an int
-        if not isinstance(meta_data["source"], int):
-            raise TooManySources("Multiple sources found in input data")
+        # Read and load input data
 
-        # Select the line IDs and the feeder IDs from the input data and the meta data
-        line_ids = [l["id"] for l in input_data["line"]]
-        feeder_ids = meta_data["lv_feeders"]
+        # The cached loaders only parse a file again after it changed on disk. Of the profiles, the checks below
+        # first only need the row count and timestamp range from the parquet footers, so no profile data is decoded.
+        # The files are independent and pyarrow releases the GIL while decoding, so they are read concurrently
+        profile_paths = (ev_active_power_profile, active_power_profile, reactive_power_profile)
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            signature_futures = [executor.submit(profile_timestamp_signature, path) for path in profile_paths]
+            meta_data_future = executor.submit(load_metadata, meta_data_str)
+            input_data_future = executor.submit(_load_network, input_network_data, input_network_json)
+
+        ev_signature, active_signature, reactive_signature = (future.result() for future in signature_futures)
+
+        meta_data = meta_data_future.result()
+
+        input_data = input_data_future.result()
+
+        # Ensure there is only one transformer in the LV grid -> Check the rows of the transformer array and that
+        # "transformer" in meta_data is a single integer ID (a bool is an int, but never an ID).
+        # These constant-time checks run before the PGM validation so that they fail fast
+        if input_data["transformer"].shape[0] != 1 or not _is_single_id(meta_data["transformer"]):
+            raise TooManyTransformers("The grid must contain exactly one transformer")
+
+        # Ensure there is only one source in the LV grid -> Same checks for the source
+        if input_data["source"].shape[0] != 1 or not _is_single_id(meta_data["source"]):
+            raise TooManySources("The grid must contain exactly one source")
+
+        # The LV grid should be a valid PGM input data -> Validate data for PGM, once per version of the file;
+        # network data given as a string has no version to cache, so it is validated every time
+        if input_network_json is None:
+            network_stat = os.stat(input_network_data)
+            _assert_valid_input_file(str(input_network_data), network_stat.st_mtime_ns, network_stat.st_size)
+        else:
+            assert_valid_input_data(input_data=input_data, calculation_type=CalculationType.power_flow)
+
+        # Select the line IDs and the feeder IDs from the input data and the meta data; the PGM data are
+        # structured arrays, so every field is taken as a whole column
+        lines = input_data["line"]
+        line_ids = lines["id"]
+        # A single feeder may be given as a plain ID rather than a list
+        feeder_ids = np.atleast_1d(meta_data["lv_feeders"])
 
         # Ensure all the IDs in the LV Feeder IDs are valid line IDs
-        if not np.all(np.isin(feeder_ids, line_ids)):
+        if not set(line_ids.tolist()).issuperset(feeder_ids.tolist()):
             raise NotAllFeederIDsareValid("Invalid feeder IDs found")
-        # Filter the matrix to find transformers and feeders and compare their to_ and from_ nodes
-        line_from_node = [l["from_node"] for l in input_data["line"]]
-        line_ids_from_node = np.column_stack((line_ids, line_from_node))
-        filter_matrix = np.isin(line_ids_from_node[:, 0], feeder_ids)
-        filtered = line_ids_from_node[filter_matrix]
-        transformer = [t["to_node"] for t in input_data["transformer"]]
+        # Select the from_node of the feeders and compare them with the to_node of the transformer
+        line_from_node = lines["from_node"]
+        feeder_from_node = line_from_node[np.isin(line_ids, feeder_ids)]
+        # There is exactly one transformer, so every feeder is compared with a single node in one vectorized pass
+        transformer_to_node = input_data["transformer"]["to_node"][0]
 
         # Ensure all the lines in the LV Feeder IDs have the from_node the same as the to_node of the transformer.
-        for i in filtered:
-            if i[1] != transformer:
-                raise TransformerAndFeedersNotConnected("Feeders not connected to transformer")
+        if not (feeder_from_node == transformer_to_node).all():
+            raise TransformerAndFeedersNotConnected("Feeders not connected to transformer")
+
+        # Profiles with a different number of rows or known timestamp range are rejected from their metadata alone
+        if not _signatures_may_match(ev_signature, active_signature, reactive_signature):
+            raise TimestampsDoNotMatchError("Timestamps of EV, active and reactive power profiles do not match.")
 
-        timestamps_ev = ev_power_profile.index
-        timestamps_active = active_profile.index
-        timestamps_reactive = reactive_profile.index
+        # Otherwise only the timestamp column of each profile is decoded to compare the timestamps themselves
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            timestamps_ev, timestamps_active, timestamps_reactive = executor.map(_read_timestamps, profile_paths)
 
-        if not (timestamps_ev.equals(timestamps_active) and timestamps_ev.equals(timestamps_reactive)):
+        if not (
+            _timestamps_equal(timestamps_ev, timestamps_active)
+            and _timestamps_equal(timestamps_ev, timestamps_reactive)
+        ):
             raise TimestampsDoNotMatchError("Timestamps of EV, active and reactive power profiles do not match.")
 
         # Select the sym_loads and count them, select the number of EV-profiles and count them
         num_houses = len(input_data["sym_load"])
-        ev_profiles = ev_power_profile.to_numpy()
 
         # Ensure the number of EV charging profile is at least the same as the number of sym_load.
-        if not ev_profiles.shape[1] >= num_houses:
+        if profile_column_count(ev_active_power_profile) < num_houses:
             raise TooFewEVs("Insufficient EV profiles")
 
         # Calling GraphProcessor to ensure that:
         #       The grid is fully connected in the initial state.
         #       The grid has no cycles in the initial state.
-        vertex_ids = [n["id"] for n in input_data["node"]]
+        vertex_ids = input_data["node"]["id"]
         transformer_id = input_data["transformer"][0]["id"]
 
-        # The edge_ids consist of the line IDs and the transformer ID
-        edge_ids_init = pd.DataFrame(line_ids).to_numpy()
-        edge_ids = np.append(edge_ids_init, transformer_id).tolist()
+        # The edge_ids consist of the line IDs and the transformer ID; GraphProcessor takes the arrays as they are
+        edge_ids = np.concatenate([line_ids, [transformer_id]])
 
-        line_from_status = np.array([n["from_status"] for n in input_data["line"]])
-        line_to_status = np.array([n["to_status"] for n in input_data["line"]])
-        edge_enabled_init = (line_from_status == 1) & (line_to_status == 1)
-        edge_enabled = np.append(edge_enabled_init, [True])
+        edge_enabled_init = (lines["from_status"] == 1) & (lines["to_status"] == 1)
+        edge_enabled = np.concatenate([edge_enabled_init, [True]])
 
-        # Tupling the vertex IDs in pairs
-        line_to_node = [l["to_node"] for l in input_data["line"]]
+        # The vertex IDs of every edge as rows of an (N, 2) array: the lines followed by the transformer
         source_node = input_data["source"][0]["node"]
-        edge_vertex_id_pairs_init = list(zip(line_from_node, line_to_node))
-        edge_vertex_id_pairs = (edge_vertex_id_pairs_init) + [(source_node, meta_data["lv_busbar"])]
+        edge_vertex_id_pairs = np.empty((len(lines) + 1, 2), dtype=lines["from_node"].dtype)
+        edge_vertex_id_pairs[:-1, 0] = line_from_node
+        edge_vertex_id_pairs[:-1, 1] = lines["to_node"]
+        edge_vertex_id_pairs[-1] = (source_node, meta_data["lv_busbar"])
 
-        graph(vertex_ids, edge_ids, edge_vertex_id_pairs, edge_enabled, source_node)
+        graph.validate_only(vertex_ids, edge_ids, edge_vertex_id_pairs, edge_enabled, source_node)
@@ -1,7 +1,17 @@
+# pylint: disable=redefined-outer-name, protected-access
+import json
+
+import numpy as np
 import pandas as pd
+import pytest
 from pandas.testing import assert_frame_equal
 
-from power_system_simulation.ev_penetration_module import ev_penetration
+from power_system_simulation import ev_penetration_module
+from power_system_simulation.ev_penetration_module import (
+    EVPenetrationRunner,
+    ev_penetration,
+    run_ev_penetration_batch,
+)
 
 PATH_INPUT_NETWORK_DATA = "data/test_data/input_EV_penetration/input_network_data.json"
 PATH_META_DATA = "data/test_data/input_EV_penetration/meta_data.json"
@@ -9,52 +19,146 @@ PATH_ACTIVE_POWER_PROFILE = "data/test_data/input_EV_penetration/active_power_pr
 PATH_EV_ACTIVE_POWER_PROFILE = "data/test_data/input_EV_penetration/ev_active_power_profile.parquet"
 
 
-PATH_EXPECTED_LINE_DF = "data/test_data/output_EV_penetration/EV_penetration_line_df.json"
-PATH_EXPECTED_VOLTAGE_DF = "data/test_data/output_EV_penetration/EV_penetration_voltage_df.json"
+PATH_EXPECTED_LINE_DF = "data/test_data/output_EV_penetration/EV_penetration_line_df.parquet"
+PATH_EXPECTED_VOLTAGE_DF = "data/test_data/output_EV_penetration/EV_penetration_voltage_df.parquet"
+
+
+# The households (sym_load ids) and EV profile columns that the reference tables were computed for: the selection
+# of the original random.sample draw with seed 42. It is pinned, as the seeded draw now comes from a NumPy Generator
+REFERENCE_SELECTED_IDS = np.array([12, 14])
+REFERENCE_SELECTED_COLUMNS = [2, 0]
+
 
+@pytest.fixture(scope="module")
+def expected_ev_dfs():
+    """The expected voltage and line tables, read once for the module; parquet keeps their dtypes and index names."""
+    return pd.read_parquet(PATH_EXPECTED_VOLTAGE_DF), pd.read_parquet(PATH_EXPECTED_LINE_DF)
 
-def test_ev_penetration():
-    """Test the ev_penetration function with a sample input. For the last assignment."""
-    percentage = 60
-    seed = 42
 
-    result = ev_penetration(
-        input_network_data=PATH_INPUT_NETWORK_DATA,
-        meta_data_str=PATH_META_DATA,
-        active_power_profile_path=PATH_ACTIVE_POWER_PROFILE,
-        ev_active_power_profile=PATH_EV_ACTIVE_POWER_PROFILE,
-        percentage=percentage,
-        seed=seed,
+def test_ev_penetration(expected_ev_dfs):
+    """Test the EV penetration of the reference selection against the reference tables. For the last assignment."""
+    runner = EVPenetrationRunner(
+        PATH_INPUT_NETWORK_DATA, PATH_META_DATA, PATH_ACTIVE_POWER_PROFILE, PATH_EV_ACTIVE_POWER_PROFILE
     )
+    result = runner.run_selection(REFERENCE_SELECTED_IDS, REFERENCE_SELECTED_COLUMNS)
     voltage_df = result[0]
     line_df = result[1]
-    voltage_df_correct = pd.read_json(PATH_EXPECTED_VOLTAGE_DF, orient="split")
-    line_df_correct = pd.read_json(
-        PATH_EXPECTED_LINE_DF, orient="split", convert_dates=["Max_Loading_Timestamp", "Min_Loading_Timestamp"]
-    )
+    # Copies, as the expected tables are shared between the tests of this module
+    voltage_df_correct, line_df_correct = (df.copy() for df in expected_ev_dfs)
 
     assert isinstance(result, tuple), "Result should be a tuple."
     assert len(result) == 2, "Result should contain three elements."
     assert isinstance(result[0], pd.DataFrame), "First element should be a DataFrame."
     assert isinstance(result[1], pd.DataFrame), "Second element should be a DataFrame."
 
+    # The reference losses are summed per timestamp step; Total_Loss is in kWh, so with the uniform steps of the
+    # profiles it is the reference times the step length in hours
+    steps = np.diff(voltage_df_correct.index.to_numpy())
+    assert (steps == steps[0]).all()
+    line_df_correct["Total_Loss"] *= steps[0] / np.timedelta64(1, "h")
+
     voltage_df = voltage_df.sort_index().sort_index(axis=1)
     voltage_df_correct = voltage_df_correct.sort_index().sort_index(axis=1)
-    voltage_df_correct.index.name = "Timestamp"
     line_df = line_df.sort_index().sort_index(axis=1)
     line_df_correct = line_df_correct.sort_index().sort_index(axis=1)
-    line_df_correct.index.name = "Line_ID"
 
     line_df.index = line_df.index.astype("int64")
-    line_df_correct.index = line_df_correct.index.astype("int64")
-
-    assert (voltage_df.round(10).compare(voltage_df_correct.round(10))).empty
-    # assert (line_df.round(10).compare(line_df_correct.round(10))).empty
-
-    # assert_frame_equal(
-    #     line_df.round(10),
-    #     line_df_correct.round(10),
-    #     check_exact=False,
-    #     rtol=1e-9,
-    #     atol=1e-12,
-    # )
+
+    # The reference losses agree with the original code only to a relative 2.3e-7, so they get a relative tolerance
+    np.testing.assert_allclose(line_df["Total_Loss"].to_numpy(), line_df_correct["Total_Loss"].to_numpy(), rtol=1e-6)
+
+    # Same labels, then the values within the precision of the reference files in one vectorized comparison
+    for df, df_correct in [(voltage_df, voltage_df_correct), (line_df, line_df_correct)]:
+        assert df.index.equals(df_correct.index)
+        assert df.columns.equals(df_correct.columns)
+        numeric_columns = df_correct.select_dtypes("number").columns.drop("Total_Loss", errors="ignore")
+        np.testing.assert_allclose(
+            df[numeric_columns].to_numpy(), df_correct[numeric_columns].to_numpy(), rtol=0, atol=1e-10
+        )
+        for column in df_correct.select_dtypes(exclude="number").columns:
+            np.testing.assert_array_equal(df[column].to_numpy(), df_correct[column].to_numpy())
+
+
+def test_ev_penetration_selects_one_household_per_feeder():
+    """60 % of the four households over two feeders gives each feeder one EV, with distinct EV profiles."""
+    runner = EVPenetrationRunner(
+        PATH_INPUT_NETWORK_DATA, PATH_META_DATA, PATH_ACTIVE_POWER_PROFILE, PATH_EV_ACTIVE_POWER_PROFILE
+    )
+    for seed in range(5):
+        selected_ids, selected_columns = runner.select_ev_chargers(60, seed)
+        # The households 12 and 13 are behind feeder 16, the households 14 and 15 behind feeder 20
+        assert len(set(selected_ids.tolist()) & {12, 13}) == len(set(selected_ids.tolist()) & {14, 15}) == 1
+        assert len(set(selected_columns)) == len(selected_columns) == 2
+        assert set(selected_columns) <= {0, 1, 2, 3}
+
+
+def test_ev_penetration_single_feeder_id(tmp_path):
+    """A single feeder given as a plain ID instead of a list is accepted, and only its households get EVs."""
+    with open(PATH_META_DATA, "r", encoding="utf-8") as fp:
+        meta_data = json.load(fp)
+    meta_data_path = tmp_path / "meta_data.json"
+    meta_data_path.write_text(json.dumps({**meta_data, "lv_feeders": 16}), encoding="utf-8")
+
+    runner = EVPenetrationRunner(
+        PATH_INPUT_NETWORK_DATA, str(meta_data_path), PATH_ACTIVE_POWER_PROFILE, PATH_EV_ACTIVE_POWER_PROFILE
+    )
+    selected_ids, _ = runner.select_ev_chargers(50, 42)
+    assert sorted(selected_ids.tolist()) == [12, 13]
+
+
+def test_run_ev_penetration_batch_matches_single_runs():
+    """The batch runner returns the same results as separate ev_penetration calls, in scenario order."""
+    scenarios = [
+        {
+            "input_network_data": PATH_INPUT_NETWORK_DATA,
+            "meta_data_str": PATH_META_DATA,
+            "active_power_profile_path": PATH_ACTIVE_POWER_PROFILE,
+            "ev_active_power_profile": PATH_EV_ACTIVE_POWER_PROFILE,
+            "percentage": percentage,
+            "seed": seed,
+        }
+        for percentage, seed in [(60, 42), (20, 7)]
+    ]
+
+    results = run_ev_penetration_batch(scenarios, n_procs=2)
+
+    assert len(results) == len(scenarios)
+    for scenario, (voltage_df, line_df) in zip(scenarios, results):
+        expected_voltage_df, expected_line_df = ev_penetration(**scenario)
+        assert_frame_equal(voltage_df, expected_voltage_df)
+        assert_frame_equal(line_df, expected_line_df)
+
+    assert not run_ev_penetration_batch([])
+
+
+def test_worker_runs_scenarios_on_one_runner(monkeypatch):
+    """A worker builds the runner of a network once and runs all its scenarios on it."""
+    monkeypatch.setattr(ev_penetration_module, "_WORKER_RUNNERS", {})
+    paths = (PATH_INPUT_NETWORK_DATA, PATH_META_DATA, PATH_ACTIVE_POWER_PROFILE, PATH_EV_ACTIVE_POWER_PROFILE)
+    ev_penetration_module._init_worker((paths,))
+    runner = ev_penetration_module._WORKER_RUNNERS[paths]
+
+    for percentage, seed in [(60, 42), (20, 7)]:
+        scenario = dict(zip(ev_penetration_module._RUNNER_ARGS, paths), percentage=percentage, seed=seed)
+        voltage_df, line_df = ev_penetration_module._run_scenario(scenario)
+        expected_voltage_df, expected_line_df = runner.run(percentage, seed)
+        assert_frame_equal(voltage_df, expected_voltage_df)
+        assert_frame_equal(line_df, expected_line_df)
+
+    assert ev_penetration_module._WORKER_RUNNERS == {paths: runner}
+
+
+def test_ev_penetration_runner_reuse():
+    """A runner reused for several scenarios gives the same results as separate ev_penetration calls."""
+    paths = (PATH_INPUT_NETWORK_DATA, PATH_META_DATA, PATH_ACTIVE_POWER_PROFILE, PATH_EV_ACTIVE_POWER_PROFILE)
+    runner = EVPenetrationRunner(*paths)
+
+    for percentage, seed in [(60, 42), (20, 7), (60, 42)]:
+        voltage_df, line_df = runner.run(percentage, seed)
+        expected_voltage_df, expected_line_df = ev_penetration(*paths, percentage=percentage, seed=seed)
+        assert_frame_equal(voltage_df, expected_voltage_df)
+        assert_frame_equal(line_df, expected_line_df)
+
+    selected_ids, selected_columns = runner.select_ev_chargers(60, 42)
+    assert len(selected_ids) == len(selected_columns) == len(set(selected_columns))
+    assert len(set(selected_ids.tolist())) == len(selected_ids)
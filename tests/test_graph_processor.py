@@ -1,12 +1,15 @@
-# pylint: disable=redefined-outer-name, import-error, no-name-in-module,invalid-name, function-redefined
+# pylint: disable=redefined-outer-name, import-error, no-name-in-module,invalid-name
 
 """Test for graph_processor"""
+
 # ─────────────────────────────────────────────────────────────
 # IMPORTS
 # ─────────────────────────────────────────────────────────────
 
 
 import matplotlib
+import matplotlib.pyplot as plt
+import numpy as np
 import pytest
 from matplotlib.figure import Figure
 
@@ -25,25 +28,27 @@ from power_system_simulation.graph_processor import (
 # ─────────────────────────────────────────────────────────────
 
 
-@pytest.fixture
+# Input of the graph fixture, also the base of the construction error cases
+VERTEX_IDS = [0, 2, 4, 6, 10]
+EDGE_IDS = [1, 3, 5, 7, 8, 9]
+EDGE_PAIRS = [(0, 2), (0, 4), (0, 6), (2, 4), (4, 6), (2, 10)]
+EDGE_ENABLED = [True, True, True, False, False, True]
+SOURCE_ID = 10
+
+
+@pytest.fixture(scope="module")
 def graph():
     """
     Pytest fixture for creating a GraphProcessor instance.
 
     Constructs a graph with specified vertex and edge configurations for use in tests.
+    The graph is built once per module, so the tests must only read from it.
 
     Returns:
         GraphProcessor: Initialized graph object for testing.
     """
-    # Define graph components
-    vertex_ids = [0, 2, 4, 6, 10]
-    edge_ids = [1, 3, 5, 7, 8, 9]
-    edge_vertex_id_pairs = [(0, 2), (0, 4), (0, 6), (2, 4), (4, 6), (2, 10)]
-    edge_enabled = [True, True, True, False, False, True]
-    source_vertex_id = 10
-
     # Create and return GraphProcessor instance
-    return GraphProcessor(vertex_ids, edge_ids, edge_vertex_id_pairs, edge_enabled, source_vertex_id)
+    return GraphProcessor(VERTEX_IDS, EDGE_IDS, EDGE_PAIRS, EDGE_ENABLED, SOURCE_ID)
 
 
 # ─────────────────────────────────────────────────────────────
@@ -59,113 +64,103 @@ def test_successful_initialization(graph):
     assert isinstance(graph, GraphProcessor)
 
 
-def test_duplicate_vertex_and_edge_ids_raises(graph):
-    """
-    Ensure that overlapping IDs between vertex and edge lists raise IDNotUniqueError.
-    """
-    # Modify vertex_ids to conflict with edge IDs
-    vertex_ids = [0, 2, 5, 6, 10]
-    graph.vertex_ids = vertex_ids
-
-    # Expect error due to ID conflict
-    with pytest.raises(IDNotUniqueError):
-        GraphProcessor(
-            vertex_ids, graph.edge_ids, graph.edge_vertex_id_pairs, graph.edge_enabled, graph.source_vertex_id
-        )
-
-
-def test_mismatched_edge_list_length_raises(graph):
-    """
-    Validate that a malformed edge list raises InputLengthDoesNotMatchError.
-    """
-    # Provide fewer edge pairs than edge IDs
-    invalid_edge_pairs = [(1, 2)]
-
-    # Expect error due to length mismatch
-    with pytest.raises(InputLengthDoesNotMatchError):
-        GraphProcessor(graph.vertex_ids, graph.edge_ids, invalid_edge_pairs, graph.edge_enabled, graph.source_vertex_id)
-
-
-def test_invalid_vertex_in_edge_pair_raises(graph):
-    """
-    Ensure that unknown vertex IDs in edges raise IDNotFoundError.
-    """
-    # Include invalid vertex 1000 in edge pairs
-    invalid_edge_pairs = [(0, 1000), (0, 4), (0, 6), (2, 4), (4, 6), (2, 10)]
-
-    # Expect error due to invalid vertex
-    with pytest.raises(IDNotFoundError):
-        GraphProcessor(graph.vertex_ids, graph.edge_ids, invalid_edge_pairs, graph.edge_enabled, graph.source_vertex_id)
-
-
-def test_mismatched_enabled_flags_length_raises(graph):
-    """
-    Ensure that the length mismatch in enabled edge flags raises InputLengthDoesNotMatchError.
-    """
-    # Only one flag for several edges
-    invalid_edge_enabled = [True]
-
-    # Expect error due to mismatch
-    with pytest.raises(InputLengthDoesNotMatchError):
-        GraphProcessor(
-            graph.vertex_ids, graph.edge_ids, graph.edge_vertex_id_pairs, invalid_edge_enabled, graph.source_vertex_id
-        )
-
-
-def test_invalid_source_vertex_raises(graph):
+@pytest.mark.parametrize(
+    "vertex_ids, edge_ids, edge_pairs, edge_enabled, source_id, expected_error",
+    [
+        pytest.param(
+            [0, 2, 5, 6, 10], EDGE_IDS, EDGE_PAIRS, EDGE_ENABLED, SOURCE_ID, IDNotUniqueError, id="vertex_and_edge_id"
+        ),
+        pytest.param([0, 1, 2], [1], [(0, 2)], [True], 0, IDNotUniqueError, id="vertex_and_edge_id_small"),
+        pytest.param([0, 2, 2], [1, 3], [(0, 2), (2, 4)], [True, True], 0, IDNotUniqueError, id="repeated_vertex_id"),
+        pytest.param([0, 2, 4], [1, 1], [(0, 2), (2, 4)], [True, True], 0, IDNotUniqueError, id="repeated_edge_id"),
+        pytest.param(
+            VERTEX_IDS, EDGE_IDS, [(1, 2)], EDGE_ENABLED, SOURCE_ID, InputLengthDoesNotMatchError, id="pairs_length"
+        ),
+        pytest.param(
+            VERTEX_IDS,
+            EDGE_IDS,
+            [(0, 1000), (0, 4), (0, 6), (2, 4), (4, 6), (2, 10)],
+            EDGE_ENABLED,
+            SOURCE_ID,
+            IDNotFoundError,
+            id="unknown_vertex_in_pair",
+        ),
+        pytest.param(
+            VERTEX_IDS, EDGE_IDS, EDGE_PAIRS, [True], SOURCE_ID, InputLengthDoesNotMatchError, id="enabled_length"
+        ),
+        pytest.param(VERTEX_IDS, EDGE_IDS, EDGE_PAIRS, EDGE_ENABLED, 99, IDNotFoundError, id="unknown_source"),
+        pytest.param([0, 2, 4], [1], [(0, 2)], [True], 0, GraphNotFullyConnectedError, id="not_connected"),
+        pytest.param(
+            [1, 2, 3], [10, 11, 12], [(1, 2), (2, 3), (3, 1)], [True] * 3, 1, GraphCycleError, id="triangle_cycle"
+        ),
+        pytest.param(
+            VERTEX_IDS,
+            EDGE_IDS,
+            [("0", "2"), (0, 4), (0, 6), (2, 4), (4, 6), (2, 10)],
+            EDGE_ENABLED,
+            SOURCE_ID,
+            IDNotFoundError,
+            id="non_integer_vertex_in_pair",
+        ),
+        pytest.param(["a", "b"], ["e"], [("a", "c")], [True], "a", IDNotFoundError, id="unknown_string_vertex"),
+        # A graph which is both disconnected and cyclic reports the missing connection first
+        pytest.param(
+            [1, 2, 3, 4],
+            [10, 11, 12],
+            [(1, 2), (2, 3), (3, 1)],
+            [True] * 3,
+            1,
+            GraphNotFullyConnectedError,
+            id="not_connected_with_cycle",
+        ),
+    ],
+)
+def test_invalid_graph_raises(vertex_ids, edge_ids, edge_pairs, edge_enabled, source_id, expected_error):
     """
-    Ensure that an unknown source vertex raises IDNotFoundError.
+    Ensure that GraphProcessor rejects every invalid input with the matching error.
     """
-    # Use invalid source vertex ID
-    with pytest.raises(IDNotFoundError):
-        GraphProcessor(graph.vertex_ids, graph.edge_ids, graph.edge_vertex_id_pairs, graph.edge_enabled, 99)
+    with pytest.raises(expected_error):
+        GraphProcessor(vertex_ids, edge_ids, edge_pairs, edge_enabled, source_id)
 
 
-def test_duplicate_vertex_and_edge_ids():
+def test_non_integer_ids():
     """
-    Ensure that GraphProcessor raises IDNotUniqueError when vertex and edge IDs overlap.
+    Verify that vertex and edge IDs of other hashable types, such as strings, are accepted.
     """
-    # Overlapping ID '1' in vertex_ids and edge_ids
-    vertex_ids = [0, 1, 2]
-    edge_ids = [1]
-    edge_vertex_id_pairs = [(0, 2)]
-    edge_enabled = [True]
-    source_vertex_id = 0
+    string_graph = GraphProcessor(
+        ["a", "b", "c", "d"],
+        ["ab", "bc", "bd", "cd"],
+        [("a", "b"), ("b", "c"), ("b", "d"), ("c", "d")],
+        [True, True, True, False],
+        "a",
+    )
 
-    # Expect error due to ID conflict
-    with pytest.raises(IDNotUniqueError):
-        GraphProcessor(vertex_ids, edge_ids, edge_vertex_id_pairs, edge_enabled, source_vertex_id)
+    assert string_graph.find_downstream_vertices("bc") == ["c"]
+    assert string_graph.find_downstream_vertices("ab") == ["b", "c", "d"]
+    assert string_graph.find_alternative_edges("bd") == ["cd"]
 
 
-def test_graph_not_fully_connected():
-    """
-    Ensure that GraphProcessor raises GraphNotFullyConnectedError if not all vertices are reachable.
-    """
-    # Vertex 4 is disconnected
-    vertex_ids = [0, 2, 4]
-    edge_ids = [1]
-    edge_vertex_id_pairs = [(0, 2)]
-    edge_enabled = [True]
-    source_vertex_id = 0
-
-    # Expect error due to disconnected graph
-    with pytest.raises(GraphNotFullyConnectedError):
-        GraphProcessor(vertex_ids, edge_ids, edge_vertex_id_pairs, edge_enabled, source_vertex_id)
-
-
-def test_graph_with_cycle_raises():
+@pytest.mark.parametrize(
+    "vertex_ids, edge_pairs, expected_error",
+    [
+        ([1, 2, 3], [(1, 2), (2, 3)], None),  # a tree
+        ([1, 2, 3, 4], [(1, 2), (2, 3)], GraphNotFullyConnectedError),  # vertex 4 is not reached
+        ([1, 2, 3], [(1, 2), (2, 3), (3, 1)], GraphCycleError),  # triangle
+        ([1, 2, 3], [(1, 2), (2, 99)], IDNotFoundError),  # unknown vertex
+    ],
+)
+def test_validate_only_matches_constructor(vertex_ids, edge_pairs, expected_error):
     """
-    Ensure that cycles in the graph raise GraphCycleError.
+    Ensure that validate_only accepts and rejects the same graphs as the constructor.
     """
-    # Create a triangle (cycle)
-    vertex_ids = [1, 2, 3]
-    edge_ids = [10, 11, 12]
-    edge_pairs = [(1, 2), (2, 3), (3, 1)]
-    edge_enabled = [True, True, True]
-
-    # Expect cycle error
-    with pytest.raises(GraphCycleError):
-        GraphProcessor(vertex_ids, edge_ids, edge_pairs, edge_enabled, source_vertex_id=1)
+    edge_ids = list(range(10, 10 + len(edge_pairs)))
+    edge_enabled = [True] * len(edge_pairs)
+    for build in (GraphProcessor, GraphProcessor.validate_only):
+        if expected_error is None:
+            build(vertex_ids, edge_ids, edge_pairs, edge_enabled, 1)
+        else:
+            with pytest.raises(expected_error):
+                build(vertex_ids, edge_ids, edge_pairs, edge_enabled, 1)
 
 
 # ─────────────────────────────────────────────────────────────
@@ -173,17 +168,15 @@ def test_graph_with_cycle_raises():
 # ─────────────────────────────────────────────────────────────
 
 
-def test_downstream_vertices(graph):
+@pytest.mark.parametrize(
+    "edge_id, expected",
+    [(1, [0, 4, 6]), (3, [4]), (5, [6]), (7, []), (8, []), (9, [0, 2, 4, 6])],
+)
+def test_downstream_vertices(graph, edge_id, expected):
     """
     Validate downstream vertex resolution for various enabled edges.
     """
-    # Test multiple edge IDs for correct downstream vertex sets
-    assert graph.find_downstream_vertices(1) == [0, 4, 6]
-    assert graph.find_downstream_vertices(3) == [4]
-    assert graph.find_downstream_vertices(5) == [6]
-    assert graph.find_downstream_vertices(7) == []
-    assert graph.find_downstream_vertices(8) == []
-    assert graph.find_downstream_vertices(9) == [0, 2, 4, 6]
+    assert graph.find_downstream_vertices(edge_id) == expected
 
 
 def test_downstream_vertices_1():
@@ -203,7 +196,24 @@ def test_downstream_vertices_1():
     assert graph.find_downstream_vertices(3) == [4]
 
 
-def test_IDNotFound(graph):
+def test_numpy_array_input(graph):
+    """
+    Verify that NumPy array inputs, with the vertex pairs as an (E, 2) array, give the same results as lists.
+    """
+    # Build the same graph from arrays
+    array_graph = GraphProcessor(
+        np.array(graph.vertex_ids),
+        np.array(graph.edge_ids),
+        np.array(graph.edge_vertex_id_pairs),
+        np.array(graph.edge_enabled),
+        graph.source_vertex_id,
+    )
+    for edge_id in [1, 3, 9]:
+        assert array_graph.find_downstream_vertices(edge_id) == graph.find_downstream_vertices(edge_id)
+        assert array_graph.find_alternative_edges(edge_id) == graph.find_alternative_edges(edge_id)
+
+
+def test_IDNotFound_downstream(graph):
     """
     Ensure that querying an unknown edge raises IDNotFoundError.
     """
@@ -217,15 +227,38 @@ def test_IDNotFound(graph):
 # ─────────────────────────────────────────────────────────────
 
 
-def test_alternative_edges(graph):
+@pytest.mark.parametrize("edge_id, expected", [(3, [7, 8]), (1, [7]), (5, [8]), (9, [])])
+def test_alternative_edges(graph, edge_id, expected):
     """
     Validate correct resolution of alternative edges.
     """
-    # Check correct alternatives for disabled edges
-    assert graph.find_alternative_edges(3) == [7, 8]
-    assert graph.find_alternative_edges(1) == [7]
-    assert graph.find_alternative_edges(5) == [8]
-    assert graph.find_alternative_edges(9) == []
+    assert graph.find_alternative_edges(edge_id) == expected
+
+
+def test_alternative_edges_match_brute_force():
+    """
+    Cross-check alternative edges on a larger random tree against rebuilding the graph for every candidate.
+    """
+    rng = np.random.default_rng(0)
+    vertex_ids = list(range(40))
+    # Random spanning tree plus extra disabled edges
+    edge_vertex_id_pairs = [(int(rng.integers(0, vertex)), vertex) for vertex in range(1, 40)]
+    edge_vertex_id_pairs += [tuple(int(v) for v in rng.choice(40, size=2, replace=False)) for _ in range(15)]
+    edge_ids = list(range(100, 100 + len(edge_vertex_id_pairs)))
+    edge_enabled = [True] * 39 + [False] * 15
+    tree = GraphProcessor(vertex_ids, edge_ids, edge_vertex_id_pairs, edge_enabled, source_vertex_id=0)
+
+    for disabled_index in range(39):
+        expected = []
+        for candidate_index in range(39, len(edge_ids)):
+            swapped = list(edge_enabled)
+            swapped[disabled_index], swapped[candidate_index] = False, True
+            try:
+                GraphProcessor(vertex_ids, edge_ids, edge_vertex_id_pairs, swapped, source_vertex_id=0)
+                expected.append(edge_ids[candidate_index])
+            except (GraphNotFullyConnectedError, GraphCycleError):
+                pass
+        assert tree.find_alternative_edges(edge_ids[disabled_index]) == expected
 
 
 def test_EdgeAlreadyDisabledError(graph):
@@ -237,7 +270,7 @@ def test_EdgeAlreadyDisabledError(graph):
         graph.find_alternative_edges(7)
 
 
-def test_IDNotFound(graph):
+def test_IDNotFound_alternative(graph):
     """
     Ensure that an unknown edge ID raises IDNotFoundError in alternative edge search.
     """
@@ -269,3 +302,7 @@ def test_get_figure(graph):
     # Generate and check figure output
     fig = graph.get_figure(seed=0, figsize=(4, 3))
     assert isinstance(fig, Figure)
+
+    # Release the figure from the pyplot registry so its canvas does not live for the rest of the session
+    plt.close(fig)
+    assert not plt.fignum_exists(fig.number)
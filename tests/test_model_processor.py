@@ -3,8 +3,14 @@
 This module contains tests for the power system simulation assignment 2.
 """
 
+import json
+import os
+
+import numpy as np
 import pandas as pd
 import pytest
+from power_grid_model import ComponentType
+from power_grid_model.validation.assertions import ValidationException as PGMValidationException
 
 from power_system_simulation.model_processor import (
     IDsDoNotMatchError,
@@ -12,9 +18,16 @@ from power_system_simulation.model_processor import (
     ValidationException,
     data_processing,
     line_statistics_summary,
+    load_dataset,
     load_input_data,
+    load_metadata,
+    load_profile,
     node_voltage_summary,
+    profile_column_count,
+    profile_column_ids,
+    profile_timestamp_signature,
     run_updated_power_flow_analysis,
+    sym_load_update,
 )
 
 MODEL_DATA = "data/test_data/input/input_network_data.json"
@@ -40,6 +53,22 @@ def test_load_input_data():
     assert active_df.columns.equals(reactive_df.columns), "Active and reactive data must share the same column IDs."
 
 
+def test_load_input_data_subset():
+    """
+    Test that load_input_data only returns the requested sym_load columns and time window.
+    """
+    full_active_df, full_reactive_df, _ = load_input_data(ACTIVE_DATA_PATH, REACTIVE_DATA_PATH, MODEL_DATA)
+    columns = full_active_df.columns[:2].tolist()
+    start, end = full_active_df.index[2], full_active_df.index[5]
+
+    active_df, reactive_df, _ = load_input_data(
+        ACTIVE_DATA_PATH, REACTIVE_DATA_PATH, MODEL_DATA, columns=columns, time_range=(start, end)
+    )
+
+    pd.testing.assert_frame_equal(active_df, full_active_df.iloc[2:5][columns])
+    pd.testing.assert_frame_equal(reactive_df, full_reactive_df.iloc[2:5][columns])
+
+
 def test_load_input_data_wrong_timestamp():
     """
     Test that the load_input_data function raises a TimestampMismatchError
@@ -82,6 +111,123 @@ def test_load_input_data_invalid_file():
         load_input_data(ACTIVE_DATA_PATH, REACTIVE_DATA_PATH, "invalid_model.json")
 
 
+def test_load_dataset_returns_independent_copies():
+    """
+    Test that the cached dataset is not affected by modifications of a previously returned copy.
+    """
+    dataset = load_dataset(MODEL_DATA)
+    original_p = dataset["sym_load"]["p_specified"].copy()
+    dataset["sym_load"]["p_specified"] = 0.0
+
+    np.testing.assert_array_equal(load_dataset(MODEL_DATA)["sym_load"]["p_specified"], original_p)
+
+
+def test_load_dataset_without_copy():
+    """
+    Test that the cached dataset itself is returned without copying when it is requested read-only.
+    """
+    cached = load_dataset(MODEL_DATA, read_only=True)
+
+    assert load_dataset(MODEL_DATA, read_only=True)["node"] is cached["node"]
+    assert load_dataset(MODEL_DATA)["node"] is not cached["node"]
+
+
+def test_load_metadata_returns_copies_and_tracks_changes(tmp_path):
+    """
+    Test that the cached metadata is returned as independent copies and is re-read after the file changes.
+    """
+    metadata_path = tmp_path / "meta_data.json"
+    metadata_path.write_text(json.dumps({"lv_busbar": 1, "lv_feeders": [16, 20]}), encoding="utf-8")
+
+    metadata = load_metadata(metadata_path)
+    metadata["lv_feeders"].append(30)
+    assert load_metadata(metadata_path)["lv_feeders"] == [16, 20]
+
+    metadata_path.write_text(json.dumps({"lv_busbar": 2, "lv_feeders": [16]}), encoding="utf-8")
+    mtime_ns = metadata_path.stat().st_mtime_ns + 1_000_000
+    os.utime(metadata_path, ns=(mtime_ns, mtime_ns))
+    assert load_metadata(metadata_path) == {"lv_busbar": 2, "lv_feeders": [16]}
+
+
+def test_load_profile_column_subset():
+    """
+    Test that a column subset is read in the requested order with the full timestamp index.
+    """
+    full_df = pd.read_parquet(ACTIVE_DATA_PATH, engine="pyarrow")
+    column_ids = profile_column_ids(ACTIVE_DATA_PATH)
+    subset = column_ids[::-1][:2]
+
+    assert column_ids == full_df.columns.tolist()
+    pd.testing.assert_frame_equal(load_profile(ACTIVE_DATA_PATH, columns=subset), full_df[subset])
+
+
+def test_load_profile_returns_cached_frame():
+    """
+    Test that repeated loads of an unchanged profile return the cached frame without copying it,
+    while load_input_data hands out copies that can be modified.
+    """
+    assert load_profile(ACTIVE_DATA_PATH) is load_profile(ACTIVE_DATA_PATH)
+
+    active_df, _, _ = load_input_data(ACTIVE_DATA_PATH, REACTIVE_DATA_PATH, MODEL_DATA)
+    active_df.iloc[0, 0] = -1.0
+    assert load_profile(ACTIVE_DATA_PATH).iloc[0, 0] != -1.0
+
+
+def test_profile_column_count(tmp_path):
+    """
+    Test that the data columns are counted from the schema, also for a profile saved with a RangeIndex.
+    """
+    full_df = pd.read_parquet(ACTIVE_DATA_PATH, engine="pyarrow")
+    assert profile_column_count(ACTIVE_DATA_PATH) == full_df.shape[1]
+
+    # A RangeIndex is not stored as a column, and column names that are not IDs are still counted
+    range_index_path = tmp_path / "range_index.parquet"
+    full_df.reset_index(drop=True).rename(columns=str).add_prefix("ev_").to_parquet(range_index_path)
+    assert profile_column_count(range_index_path) == full_df.shape[1]
+
+
+def test_profile_timestamp_signature(tmp_path):
+    """
+    Test that the row count and timestamp range are read from the parquet metadata, if it has statistics
+    for a stored timestamp index.
+    """
+    full_df = pd.read_parquet(ACTIVE_DATA_PATH, engine="pyarrow")
+    assert profile_timestamp_signature(ACTIVE_DATA_PATH) == (len(full_df), full_df.index[0], full_df.index[-1])
+
+    no_statistics_path = tmp_path / "no_statistics.parquet"
+    full_df.to_parquet(no_statistics_path, engine="pyarrow", write_statistics=False)
+    assert profile_timestamp_signature(no_statistics_path) == (len(full_df), None, None)
+
+    range_index_path = tmp_path / "range_index.parquet"
+    full_df.reset_index(drop=True).to_parquet(range_index_path, engine="pyarrow")
+    assert profile_timestamp_signature(range_index_path) == (len(full_df), None, None)
+
+
+def test_sym_load_update_fills_unset_fields_with_null():
+    """
+    Test that the uninitialized update array gets every field written, with null values for the unset ones.
+    """
+    p_specified = np.array([[1.0, 2.0], [3.0, 4.0], [5.0, 6.0]])
+    update_data = sym_load_update(np.array([7, 8]), p_specified)
+
+    assert update_data.shape == (3, 2)
+    np.testing.assert_array_equal(update_data["id"], [[7, 8]] * 3)
+    np.testing.assert_array_equal(update_data["p_specified"], p_specified)
+    assert np.isnan(update_data["q_specified"]).all()
+    assert (update_data["status"] == np.iinfo(np.int8).min).all()
+
+
+def test_run_updated_power_flow_analysis_validate():
+    """
+    Test that invalid update data is only rejected before solving when validation is requested.
+    """
+    active_df, reactive_df, dataset = load_input_data(ACTIVE_DATA_PATH, REACTIVE_DATA_PATH, MODEL_DATA)
+    active_df.columns = active_df.columns + 1000
+
+    with pytest.raises(PGMValidationException):
+        run_updated_power_flow_analysis(active_df, reactive_df, dataset, validate=True)
+
+
 def test_node_voltage_summary():
     """
     Test the node_voltage_summary function to ensure it returns the correct summary DataFrame.
@@ -108,7 +254,45 @@ def test_line_voltage_summary():
     )
 
 
-# Add this test to test_assignment2.py
+def test_line_statistics_summary_non_uniform_timestamps():
+    """
+    Test that line losses are integrated over the real elapsed time when the timestamps are not equally spaced.
+    """
+    timestamps = pd.DatetimeIndex(["2024-01-01 00:00", "2024-01-01 01:00", "2024-01-01 03:00"])
+    output = {
+        ComponentType.line: {
+            "id": np.array([[1], [1], [1]]),
+            "loading": np.array([[0.1], [0.3], [0.2]]),
+            "p_from": np.array([[1500.0], [1500.0], [1500.0]]),
+            "p_to": np.array([[-500.0], [-500.0], [-500.0]]),
+        }
+    }
+
+    line_df = line_statistics_summary(output, timestamps)
+
+    assert line_df.loc[1, "Total_Loss"] == pytest.approx(3.0)
+    assert line_df.loc[1, "Max_Loading_Timestamp"] == timestamps[1]
+    assert line_df.loc[1, "Min_Loading_Timestamp"] == timestamps[0]
+
+
+def test_line_statistics_summary_quarter_hour_timestamps():
+    """
+    Test that line losses of a 15-minute profile are in kWh, not summed per timestamp step.
+    """
+    timestamps = pd.date_range("2024-01-01", periods=4, freq="15min")
+    output = {
+        ComponentType.line: {
+            "id": np.array([[1], [1], [1], [1]]),
+            "loading": np.array([[0.1], [0.2], [0.3], [0.1]]),
+            "p_from": np.array([[600.0], [1000.0], [1500.0], [500.0]]),
+            "p_to": np.array([[-200.0], [-200.0], [-300.0], [-100.0]]),
+        }
+    }
+
+    line_df = line_statistics_summary(output, timestamps)
+
+    # Losses of 400, 800, 1200 and 400 W: 0.25 h * (600 + 1000 + 800) W = 600 Wh, where a unit step gives 2.4
+    assert line_df.loc[1, "Total_Loss"] == pytest.approx(0.6)
 
 
 def test_data_processing():
@@ -1,8 +1,10 @@
 # pylint: disable= import-error, no-name-in-module, invalid-name
 """Test n1_calculation module"""
+
 from pathlib import Path
 
-import pandas as pd
+import pyarrow as pa
+import pyarrow.json as paj
 import pytest
 from pandas.testing import assert_frame_equal
 
@@ -20,7 +22,13 @@ EXPECTED_COLS = ["Alternative ID", "Max Loading", "ID_max", "Timestamp_max"]
 
 def test_corect_output():
     """ "Test corect output"""
-    correct_output = pd.read_json(CORRECT_SOL_PATH, orient="records", lines=True)
+    # The reference is JSON lines with the timestamp in epoch milliseconds, parsed by the pyarrow reader
+    correct_table = paj.read_json(str(CORRECT_SOL_PATH))
+    timestamp_column = correct_table.schema.get_field_index("Timestamp_max")
+    correct_table = correct_table.set_column(
+        timestamp_column, "Timestamp_max", correct_table["Timestamp_max"].cast(pa.timestamp("ms"))
+    )
+    correct_output = correct_table.to_pandas()
     test = n1.nm_function(20, INPUT_DATA_PATH, METADATA_PATH, ACTIVE_DATA_PATH, REACTIVE_DATA_PATH)
     assert_frame_equal(correct_output, test, check_dtype=False)
 
@@ -48,3 +56,10 @@ def test_given_lineid_is_not_int():
     """Input line ID is not int."""
     with pytest.raises(n1.IDNotInt):
         n1.nm_function("value", INPUT_DATA_PATH, METADATA_PATH, ACTIVE_DATA_PATH, REACTIVE_DATA_PATH)
+
+
+def test_sequential_matches_threaded():
+    """Solving the alternatives sequentially gives the same table as the threaded default."""
+    threaded = n1.nm_function(20, INPUT_DATA_PATH, METADATA_PATH, ACTIVE_DATA_PATH, REACTIVE_DATA_PATH)
+    sequential = n1.nm_function(20, INPUT_DATA_PATH, METADATA_PATH, ACTIVE_DATA_PATH, REACTIVE_DATA_PATH, threading=-1)
+    assert_frame_equal(threaded, sequential)
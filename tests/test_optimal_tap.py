@@ -1,9 +1,12 @@
 # pylint: disable= missing-module-docstring, import-error, no-name-in-module
 """ "Test for optimal_tap module"""
+
 from pathlib import Path
 
+import numpy as np
 import pytest
 
+from power_system_simulation import optimal_tap
 from power_system_simulation.optimal_tap import InvalidOptimizeInput, optimal_tap_position
 
 DATA_PATH = Path(__file__).parent / "stefan_data"
@@ -13,34 +16,57 @@ PATH_ACTIVE_POWER_PROFILE = DATA_PATH / "active_power_profile.parquet"
 PATH_REACTIVE_POWER_PROFILE = DATA_PATH / "reactive_power_profile.parquet"
 
 
-def test_optimal_tap_0():
-    """Test the optimal tap functionality with a custom made input."""
-    result = optimal_tap_position(
-        input_network_data=str(PATH_INPUT_NETWORK_DATA),
-        active_power_profile_path=str(PATH_ACTIVE_POWER_PROFILE),
-        reactive_power_profile_path=str(PATH_REACTIVE_POWER_PROFILE),
-        optimize_by=0,
-    )
-    assert result == 1
-
-
-def test_optimal_tap_1():
-    """Test the optimal tap functionality with a custom made input."""
-    result = optimal_tap_position(
-        input_network_data=str(PATH_INPUT_NETWORK_DATA),
-        active_power_profile_path=str(PATH_ACTIVE_POWER_PROFILE),
-        reactive_power_profile_path=str(PATH_REACTIVE_POWER_PROFILE),
-        optimize_by=1,
-    )
-    assert result == 3
-
+@pytest.mark.parametrize(
+    "optimize_by, expected",
+    [
+        # The total losses decrease from tap position 1 to 5 on this grid
+        pytest.param(0, 5, id="min_loss"),
+        pytest.param(1, 3, id="min_voltage_deviation"),
+        pytest.param(5, InvalidOptimizeInput, id="invalid"),
+    ],
+)
+def test_optimal_tap_position(optimize_by, expected):
+    """Test the optimal tap functionality with a custom made input, and the rejection of an invalid metric."""
 
-def test_invalid():
-    """ "Test for invalid input data"""
-    with pytest.raises(InvalidOptimizeInput):
-        optimal_tap_position(
+    def run():
+        return optimal_tap_position(
             input_network_data=str(PATH_INPUT_NETWORK_DATA),
             active_power_profile_path=str(PATH_ACTIVE_POWER_PROFILE),
             reactive_power_profile_path=str(PATH_REACTIVE_POWER_PROFILE),
-            optimize_by=5,
+            optimize_by=optimize_by,
         )
+
+    if isinstance(expected, type) and issubclass(expected, Exception):
+        with pytest.raises(expected):
+            run()
+    else:
+        assert run() == expected
+
+
+@pytest.mark.parametrize("optimize_by", [0, 1])
+def test_sequential_matches_threaded(optimize_by):
+    """Solving the tap positions sequentially gives the same tap position as the threaded default."""
+    paths = (str(PATH_INPUT_NETWORK_DATA), str(PATH_ACTIVE_POWER_PROFILE), str(PATH_REACTIVE_POWER_PROFILE))
+    threaded = optimal_tap_position(*paths, optimize_by=optimize_by)
+    assert optimal_tap_position(*paths, optimize_by=optimize_by, threading=-1) == threaded
+
+
+def test_equal_metrics_keep_the_first_tap_position(monkeypatch):
+    """All tap positions are evaluated in one call, and of equal minima the first position of the sweep wins."""
+    calls = []
+
+    def evaluate(*args):
+        tap_positions = args[4]
+        calls.append(tap_positions)
+        # A plateau of equal minima that does not start at either end of the sweep
+        metric = np.full(len(tap_positions), 5.0)
+        metric[1:-1] = 0.0
+        return metric
+
+    monkeypatch.setattr(optimal_tap, "_evaluate_tap_positions", evaluate)
+    tap_position = optimal_tap_position(
+        str(PATH_INPUT_NETWORK_DATA), str(PATH_ACTIVE_POWER_PROFILE), str(PATH_REACTIVE_POWER_PROFILE), 0
+    )
+
+    assert len(calls) == 1
+    assert tap_position == calls[0][1]
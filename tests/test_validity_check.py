@@ -1,11 +1,13 @@
-import copy
+# pylint: disable=redefined-outer-name
 import json
 from pathlib import Path
 
 import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 import pytest
-from power_grid_model.utils import json_deserialize, json_serialize_to_file
+from power_grid_model.utils import json_deserialize, json_serialize
 from power_grid_model.validation.assertions import ValidationException
 
 from power_system_simulation.graph_processor import (
@@ -25,229 +27,343 @@ from power_system_simulation.validity_check import (
     TooManyTransformers,
     TransformerAndFeedersNotConnected,
     ValidatePowerSystemSimulation,
+    _timestamps_equal,
 )
 
 #### TESTS FOR ASSIGNMENT 1 ####
 
-# Common minimal valid input
-VALID_VERTEX_IDS = [1, 2, 3]
-VALID_EDGE_IDS = [10, 11]
-VALID_EDGE_PAIRS = [(1, 2), (2, 3)]
-VALID_EDGE_ENABLED = [True, True]
+
+def _frozen(values, dtype):
+    """A read-only array, so the shared inputs cannot be changed by a test"""
+    array = np.array(values, dtype=dtype)
+    array.flags.writeable = False
+    return array
+
+
+# Common minimal valid input, as arrays so GraphProcessor does not convert Python lists on every construction
+VALID_VERTEX_IDS = _frozen([1, 2, 3], np.int64)
+VALID_EDGE_IDS = _frozen([10, 11], np.int64)
+VALID_EDGE_PAIRS = _frozen([[1, 2], [2, 3]], np.int64)
+VALID_EDGE_ENABLED = _frozen([True, True], bool)
 VALID_SOURCE_ID = 1
 
 
-def test_successful_initialization():
-    gp = GraphProcessor(
+@pytest.fixture(scope="module")
+def valid_gp():
+    return GraphProcessor(
         vertex_ids=VALID_VERTEX_IDS,
         edge_ids=VALID_EDGE_IDS,
         edge_vertex_id_pairs=VALID_EDGE_PAIRS,
         edge_enabled=VALID_EDGE_ENABLED,
         source_vertex_id=VALID_SOURCE_ID,
     )
-    assert isinstance(gp, GraphProcessor)
 
 
-def test_duplicate_vertex_and_edge_ids_raises():
-    vertex_ids = [1, 2, 10]  # 10 overlaps with edge_ids
-    with pytest.raises(IDNotUniqueError):
-        GraphProcessor(vertex_ids, VALID_EDGE_IDS, VALID_EDGE_PAIRS, VALID_EDGE_ENABLED, VALID_SOURCE_ID)
+def test_successful_initialization(valid_gp):
+    assert isinstance(valid_gp, GraphProcessor)
+
+
+@pytest.mark.parametrize(
+    "vertex_ids, edge_ids, edge_pairs, edge_enabled, source_id, expected_error",
+    [
+        pytest.param(
+            [1, 2, 10],  # 10 overlaps with edge_ids
+            VALID_EDGE_IDS,
+            VALID_EDGE_PAIRS,
+            VALID_EDGE_ENABLED,
+            VALID_SOURCE_ID,
+            IDNotUniqueError,
+            id="duplicate_vertex_and_edge_id",
+        ),
+        pytest.param(
+            VALID_VERTEX_IDS,
+            VALID_EDGE_IDS,
+            [(1, 2)],  # Length 1 instead of 2
+            VALID_EDGE_ENABLED,
+            VALID_SOURCE_ID,
+            InputLengthDoesNotMatchError,
+            id="edge_pairs_length",
+        ),
+        pytest.param(
+            VALID_VERTEX_IDS,
+            VALID_EDGE_IDS,
+            [(1, 99), (2, 3)],  # 99 is not a valid vertex
+            VALID_EDGE_ENABLED,
+            VALID_SOURCE_ID,
+            IDNotFoundError,
+            id="unknown_vertex_in_pair",
+        ),
+        pytest.param(
+            VALID_VERTEX_IDS,
+            VALID_EDGE_IDS,
+            VALID_EDGE_PAIRS,
+            [True],  # Only one flag for two edges
+            VALID_SOURCE_ID,
+            InputLengthDoesNotMatchError,
+            id="edge_enabled_length",
+        ),
+        pytest.param(
+            VALID_VERTEX_IDS,
+            VALID_EDGE_IDS,
+            VALID_EDGE_PAIRS,
+            VALID_EDGE_ENABLED,
+            99,
+            IDNotFoundError,
+            id="unknown_source",
+        ),
+        pytest.param(
+            [1, 2, 3],
+            [10],  # Only one edge connecting 1 and 2
+            [(1, 2)],
+            [True],
+            1,
+            GraphNotFullyConnectedError,
+            id="not_connected",
+        ),
+        pytest.param(
+            [1, 2, 3],
+            [10, 11, 12],
+            [(1, 2), (2, 3), (3, 1)],  # Triangle creates a cycle
+            [True, True, True],
+            1,
+            GraphCycleError,
+            id="cycle",
+        ),
+    ],
+)
+def test_invalid_graph_raises(vertex_ids, edge_ids, edge_pairs, edge_enabled, source_id, expected_error):
+    with pytest.raises(expected_error):
+        GraphProcessor(vertex_ids, edge_ids, edge_pairs, edge_enabled, source_id)
 
 
-def test_mismatched_edge_list_length_raises():
-    invalid_edge_pairs = [(1, 2)]  # Length 1 instead of 2
-    with pytest.raises(InputLengthDoesNotMatchError):
-        GraphProcessor(VALID_VERTEX_IDS, VALID_EDGE_IDS, invalid_edge_pairs, VALID_EDGE_ENABLED, VALID_SOURCE_ID)
+#### TEST FOR ASSIGNMENT 3 ####
 
+DATA_PATH = Path(__file__).parent / "stefan_data"
 
-def test_invalid_vertex_in_edge_pair_raises():
-    invalid_edge_pairs = [(1, 99), (2, 3)]  # 99 is not a valid vertex
-    with pytest.raises(IDNotFoundError):
-        GraphProcessor(VALID_VERTEX_IDS, VALID_EDGE_IDS, invalid_edge_pairs, VALID_EDGE_ENABLED, VALID_SOURCE_ID)
+PATH_INPUT_NETWORK_DATA = DATA_PATH / "input_network_data.json"
+PATH_META_DATA = DATA_PATH / "meta_data.json"
+PATH_EV_ACTIVE_POWER_PROFILE = DATA_PATH / "ev_active_power_profile.parquet"
+PATH_ACTIVE_POWER_PROFILE = DATA_PATH / "active_power_profile.parquet"
+PATH_REACTIVE_POWER_PROFILE = DATA_PATH / "reactive_power_profile.parquet"
 
+# The validator takes the paths as strings; converted once here rather than in every test
+STR_INPUT_NETWORK_DATA = str(PATH_INPUT_NETWORK_DATA)
+STR_META_DATA = str(PATH_META_DATA)
+STR_EV_ACTIVE_POWER_PROFILE = str(PATH_EV_ACTIVE_POWER_PROFILE)
+STR_ACTIVE_POWER_PROFILE = str(PATH_ACTIVE_POWER_PROFILE)
+STR_REACTIVE_POWER_PROFILE = str(PATH_REACTIVE_POWER_PROFILE)
 
-def test_mismatched_enabled_flags_length_raises():
-    invalid_edge_enabled = [True]  # Only one flag for two edges
-    with pytest.raises(InputLengthDoesNotMatchError):
-        GraphProcessor(VALID_VERTEX_IDS, VALID_EDGE_IDS, VALID_EDGE_PAIRS, invalid_edge_enabled, VALID_SOURCE_ID)
+SHIFTED_FIRST_TIMESTAMP = np.datetime64("2025-01-01T00:10:00", "ns")
 
 
-def test_invalid_source_vertex_raises():
-    with pytest.raises(IDNotFoundError):
-        GraphProcessor(VALID_VERTEX_IDS, VALID_EDGE_IDS, VALID_EDGE_PAIRS, VALID_EDGE_ENABLED, source_vertex_id=99)
+# The inputs are parsed lazily, once per session, and only for the tests that use them; tests modify copies
 
 
-def test_graph_not_connected_raises():
-    vertex_ids = [1, 2, 3]
-    edge_ids = [10]  # Only one edge connecting 1 and 2
-    edge_pairs = [(1, 2)]
-    edge_enabled = [True]
-    with pytest.raises(GraphNotFullyConnectedError):
-        GraphProcessor(vertex_ids, edge_ids, edge_pairs, edge_enabled, source_vertex_id=1)
+@pytest.fixture(scope="session")
+def ev_power_profile():
+    return pq.read_table(PATH_EV_ACTIVE_POWER_PROFILE, memory_map=True).to_pandas(self_destruct=True)
 
 
-def test_graph_with_cycle_raises():
-    # Triangle creates a cycle
-    vertex_ids = [1, 2, 3]
-    edge_ids = [10, 11, 12]
-    edge_pairs = [(1, 2), (2, 3), (3, 1)]
-    edge_enabled = [True, True, True]
-    with pytest.raises(GraphCycleError):
-        GraphProcessor(vertex_ids, edge_ids, edge_pairs, edge_enabled, source_vertex_id=1)
+@pytest.fixture(scope="session")
+def meta_data():
+    with open(STR_META_DATA, "r", encoding="utf-8") as fp:
+        return json.load(fp)
 
 
-#### TEST FOR ASSIGNMENT 3 ####
+@pytest.fixture(scope="session")
+def input_data():
+    with open(STR_INPUT_NETWORK_DATA, "r", encoding="utf-8") as fp:
+        return json_deserialize(fp.read())
 
-DATA_PATH = Path(__file__).parent / "stefan_data"
 
-PATH_INPUT_NETWORK_DATA = DATA_PATH / "input_network_data.json"
-PATH_META_DATA = DATA_PATH / "meta_data.json"
-PATH_EV_ACTIVE_POWER_PROFILE = DATA_PATH / "ev_active_power_profile.parquet"
-PATH_ACTIVE_POWER_PROFILE = DATA_PATH / "active_power_profile.parquet"
-PATH_REACTIVE_POWER_PROFILE = DATA_PATH / "reactive_power_profile.parquet"
+@pytest.fixture(scope="session")
+def baseline_validation():
+    """The validation of the unmodified inputs, run once per session"""
+    return ValidatePowerSystemSimulation(
+        STR_INPUT_NETWORK_DATA,
+        STR_META_DATA,
+        STR_EV_ACTIVE_POWER_PROFILE,
+        STR_ACTIVE_POWER_PROFILE,
+        STR_REACTIVE_POWER_PROFILE,
+    )
 
-ev_power_profile = pd.read_parquet(str(PATH_EV_ACTIVE_POWER_PROFILE))
-active_power_profile = pd.read_parquet(str(PATH_ACTIVE_POWER_PROFILE))
-reactive_power_profile = pd.read_parquet(str(PATH_REACTIVE_POWER_PROFILE))
 
-with open(str(PATH_META_DATA), "r", encoding="utf-8") as fp:
-    meta_data = json.load(fp)
+def _write_meta_data(directory, meta_data, **overrides):
+    """Write the metadata with some top-level entries replaced; a shallow merge, as only top-level keys change"""
+    path = directory / "meta_data_copy.json"
+    path.write_text(json.dumps({**meta_data, **overrides}, separators=(",", ":")), encoding="utf-8")
+    return path
 
-with open(str(PATH_INPUT_NETWORK_DATA), "r", encoding="utf-8") as fp:
-    input_data = json_deserialize(fp.read())
 
+def _input_json(input_data, line_index, field, value):
+    """Serialize the network data with one field of one line replaced, to be validated without a file"""
+    # Only the line array is copied; the other component arrays are shared with the session fixture
+    input_data_copy = {**input_data, "line": input_data["line"].copy()}
+    # Column-first indexing assigns into the field of the copied structured array in place
+    input_data_copy["line"][field][line_index] = value
+    return json_serialize(input_data_copy, indent=0)
 
-def test_too_many_sources():
-    meta_data_copy = copy.deepcopy(meta_data)
-    meta_data_copy["source"] = [10, 30]
-    with open(DATA_PATH / "meta_data_copy.json", "w", encoding="utf-8") as f:
-        json.dump(meta_data_copy, f, indent=2)
-    with open(DATA_PATH / "meta_data_copy.json") as f:
-        print(json.load(f))
-    with pytest.raises(TooManySources):
-        ValidatePowerSystemSimulation(
-            str(PATH_INPUT_NETWORK_DATA),
-            str(DATA_PATH / "meta_data_copy.json"),
-            str(PATH_EV_ACTIVE_POWER_PROFILE),
-            str(PATH_ACTIVE_POWER_PROFILE),
-            str(PATH_REACTIVE_POWER_PROFILE),
-        )
 
+def _write_ev_profile(directory, ev_power_profile, write_statistics=True):
+    """Write a throwaway EV profile without compression or dictionary encoding, as it is read back only once"""
+    path = directory / "ev_power_profile_copy.parquet"
+    table = pa.Table.from_pandas(ev_power_profile, preserve_index=True)
+    pq.write_table(table, path, compression="none", use_dictionary=False, write_statistics=write_statistics)
+    return path
 
-def test_too_many_transformers():
-    meta_data_copy = copy.deepcopy(meta_data)
-    meta_data_copy["transformer"] = [11, 30]
-    with open(DATA_PATH / "meta_data_copy.json", "w", encoding="utf-8") as f:
-        json.dump(meta_data_copy, f, indent=2)
-    with pytest.raises(TooManyTransformers):
-        ValidatePowerSystemSimulation(
-            str(PATH_INPUT_NETWORK_DATA),
-            str(DATA_PATH / "meta_data_copy.json"),
-            str(PATH_EV_ACTIVE_POWER_PROFILE),
-            str(PATH_ACTIVE_POWER_PROFILE),
-            str(PATH_REACTIVE_POWER_PROFILE),
-        )
+
+def test_successful_full_validation(baseline_validation):
+    assert isinstance(baseline_validation, ValidatePowerSystemSimulation)
 
 
-def test_feeder_ids_not_valid():
-    meta_data_copy = copy.deepcopy(meta_data)
-    meta_data_copy["lv_feeders"] = [16, 20, 30]
-    with open(DATA_PATH / "meta_data_copy.json", "w", encoding="utf-8") as f:
-        json.dump(meta_data_copy, f, indent=2)
-    with pytest.raises(NotAllFeederIDsareValid):
+@pytest.mark.parametrize(
+    "key, value, expected_error",
+    [
+        pytest.param("source", [10, 30], TooManySources, id="too_many_sources"),
+        pytest.param("transformer", [11, 30], TooManyTransformers, id="too_many_transformers"),
+        pytest.param("transformer", True, TooManyTransformers, id="transformer_id_is_bool"),
+        pytest.param("lv_feeders", [16, 20, 30], NotAllFeederIDsareValid, id="feeder_ids_not_valid"),
+        pytest.param("lv_feeders", 30, NotAllFeederIDsareValid, id="single_feeder_id_not_valid"),
+    ],
+)
+def test_invalid_meta_data(meta_data, tmp_path, key, value, expected_error):
+    meta_data_path = _write_meta_data(tmp_path, meta_data, **{key: value})
+    with pytest.raises(expected_error):
         ValidatePowerSystemSimulation(
-            str(PATH_INPUT_NETWORK_DATA),
-            str(DATA_PATH / "meta_data_copy.json"),
-            str(PATH_EV_ACTIVE_POWER_PROFILE),
-            str(PATH_ACTIVE_POWER_PROFILE),
-            str(PATH_REACTIVE_POWER_PROFILE),
+            STR_INPUT_NETWORK_DATA,
+            str(meta_data_path),
+            STR_EV_ACTIVE_POWER_PROFILE,
+            STR_ACTIVE_POWER_PROFILE,
+            STR_REACTIVE_POWER_PROFILE,
         )
 
 
-def test_transformer_feeder_not_connected():
-    input_data_copy = copy.deepcopy(input_data)
-    input_data_copy["line"][4]["from_node"] = 2
-    json_serialize_to_file(DATA_PATH / "input_data_copy.json", input_data_copy)
-    with pytest.raises(TransformerAndFeedersNotConnected):
-        ValidatePowerSystemSimulation(
-            str(DATA_PATH / "input_data_copy.json"),
-            str(PATH_META_DATA),
-            str(PATH_EV_ACTIVE_POWER_PROFILE),
-            str(PATH_ACTIVE_POWER_PROFILE),
-            str(PATH_REACTIVE_POWER_PROFILE),
-        )
+def test_single_feeder_id(meta_data, tmp_path):
+    # A single feeder given as a plain ID instead of a list is accepted
+    meta_data_path = _write_meta_data(tmp_path, meta_data, lv_feeders=16)
+    ValidatePowerSystemSimulation(
+        STR_INPUT_NETWORK_DATA,
+        str(meta_data_path),
+        STR_EV_ACTIVE_POWER_PROFILE,
+        STR_ACTIVE_POWER_PROFILE,
+        STR_REACTIVE_POWER_PROFILE,
+    )
 
 
-def test_too_few_ev():
-    ev_power_profile_copy = ev_power_profile.copy(deep=True)
-    ev_power_profile_copy = ev_power_profile_copy.drop(3, axis=1)
-    ev_power_profile_copy.to_parquet(DATA_PATH / "ev_power_profile_copy.parquet", engine="pyarrow")
-    with pytest.raises(TooFewEVs):
+@pytest.mark.parametrize(
+    "line_index, field, value, expected_error",
+    [
+        pytest.param(4, "from_node", 2, TransformerAndFeedersNotConnected, id="transformer_feeder_not_connected"),
+        pytest.param(0, "from_node", 2, ValidationException, id="validation_error"),
+        pytest.param(7, "to_status", 0, GraphNotFullyConnectedError, id="graph_unconnected"),
+    ],
+)
+def test_invalid_input_data(input_data, line_index, field, value, expected_error):
+    input_network_json = _input_json(input_data, line_index, field, value)
+    with pytest.raises(expected_error):
         ValidatePowerSystemSimulation(
-            str(PATH_INPUT_NETWORK_DATA),
-            str(PATH_META_DATA),
-            str(DATA_PATH / "ev_power_profile_copy.parquet"),
-            str(PATH_ACTIVE_POWER_PROFILE),
-            str(PATH_REACTIVE_POWER_PROFILE),
+            None,
+            STR_META_DATA,
+            STR_EV_ACTIVE_POWER_PROFILE,
+            STR_ACTIVE_POWER_PROFILE,
+            STR_REACTIVE_POWER_PROFILE,
+            input_network_json=input_network_json,
         )
 
 
-def test_validation_error():
-    input_data_copy = copy.deepcopy(input_data)
-    input_data_copy["line"][0]["from_node"] = 2
-    json_serialize_to_file(DATA_PATH / "input_data_copy.json", input_data_copy)
-    with pytest.raises(ValidationException):
+def test_no_input_network_data():
+    with pytest.raises(ValueError, match="input_network_json"):
         ValidatePowerSystemSimulation(
-            str(DATA_PATH / "input_data_copy.json"),
-            str(PATH_META_DATA),
-            str(PATH_EV_ACTIVE_POWER_PROFILE),
-            str(PATH_ACTIVE_POWER_PROFILE),
-            str(PATH_REACTIVE_POWER_PROFILE),
+            None,
+            STR_META_DATA,
+            STR_EV_ACTIVE_POWER_PROFILE,
+            STR_ACTIVE_POWER_PROFILE,
+            STR_REACTIVE_POWER_PROFILE,
         )
 
 
-def test_graph_unconnected():
-    input_data_copy = copy.deepcopy(input_data)
-    input_data_copy["line"][7]["to_status"] = 0
-    json_serialize_to_file(DATA_PATH / "input_data_copy.json", input_data_copy)
-    with pytest.raises(GraphNotFullyConnectedError):
+def test_too_few_ev(ev_power_profile, tmp_path):
+    # drop returns a new frame, so the shared profile is left untouched without copying it first
+    ev_power_profile_copy = ev_power_profile.drop(3, axis=1)
+    ev_power_profile_path = _write_ev_profile(tmp_path, ev_power_profile_copy)
+    with pytest.raises(TooFewEVs):
         ValidatePowerSystemSimulation(
-            str(DATA_PATH / "input_data_copy.json"),
-            str(PATH_META_DATA),
-            str(PATH_EV_ACTIVE_POWER_PROFILE),
-            str(PATH_ACTIVE_POWER_PROFILE),
-            str(PATH_REACTIVE_POWER_PROFILE),
+            STR_INPUT_NETWORK_DATA,
+            STR_META_DATA,
+            str(ev_power_profile_path),
+            STR_ACTIVE_POWER_PROFILE,
+            STR_REACTIVE_POWER_PROFILE,
         )
 
 
-def test_timestamps():
-    ev_power_profile_copy = ev_power_profile.copy(deep=True)
-    new_timestamp = ev_power_profile_copy.index.tolist()
-    new_timestamp[0] = pd.Timestamp("2025-01-01 00:10:00")
-    ev_power_profile_copy.index = new_timestamp
-    # print(ev_power_profile_copy)
-    ev_power_profile_copy.to_parquet(DATA_PATH / "ev_power_profile_copy.parquet", engine="pyarrow")
+def test_validation_error_is_not_cached(input_data, tmp_path):
+    # The validation result is cached per file, so this test writes the network data to disk
+    input_data_path = tmp_path / "input_data_copy.json"
+    input_data_path.write_text(_input_json(input_data, 0, "from_node", 2), encoding="utf-8")
+    for _ in range(2):
+        with pytest.raises(ValidationException):
+            ValidatePowerSystemSimulation(
+                str(input_data_path),
+                STR_META_DATA,
+                STR_EV_ACTIVE_POWER_PROFILE,
+                STR_ACTIVE_POWER_PROFILE,
+                STR_REACTIVE_POWER_PROFILE,
+            )
+
+
+def test_timestamps(ev_power_profile, tmp_path):
+    # Shift the first timestamp on a copy of the raw index; set_axis returns a new frame sharing the values
+    new_timestamp = ev_power_profile.index.to_numpy(copy=True)
+    new_timestamp[0] = SHIFTED_FIRST_TIMESTAMP
+    ev_power_profile_copy = ev_power_profile.set_axis(pd.DatetimeIndex(new_timestamp))
+    ev_power_profile_path = _write_ev_profile(tmp_path, ev_power_profile_copy)
     with pytest.raises(TimestampsDoNotMatchError):
         ValidatePowerSystemSimulation(
-            str(PATH_INPUT_NETWORK_DATA),
-            str(PATH_META_DATA),
-            str(DATA_PATH / "ev_power_profile_copy.parquet"),
-            str(PATH_ACTIVE_POWER_PROFILE),
-            str(PATH_REACTIVE_POWER_PROFILE),
+            STR_INPUT_NETWORK_DATA,
+            STR_META_DATA,
+            str(ev_power_profile_path),
+            STR_ACTIVE_POWER_PROFILE,
+            STR_REACTIVE_POWER_PROFILE,
         )
 
 
+def test_profile_without_statistics(ev_power_profile, tmp_path):
+    # Without statistics the timestamp range is unknown, so the timestamps themselves are compared and match
+    ev_power_profile_path = _write_ev_profile(tmp_path, ev_power_profile, write_statistics=False)
+    ValidatePowerSystemSimulation(
+        STR_INPUT_NETWORK_DATA,
+        STR_META_DATA,
+        str(ev_power_profile_path),
+        STR_ACTIVE_POWER_PROFILE,
+        STR_REACTIVE_POWER_PROFILE,
+    )
+
+
+def test_timestamps_equal():
+    regular = pd.date_range("2025-01-01", periods=96, freq="15min")
+    assert _timestamps_equal(regular, pd.date_range("2025-01-01", periods=96, freq="15min"))
+    assert not _timestamps_equal(regular, regular[:-1])
+    assert not _timestamps_equal(regular, regular + pd.Timedelta(minutes=15))
+
+    # Without a frequency a difference in the middle is still found
+    shifted = regular.tolist()
+    shifted[48] = shifted[48] + pd.Timedelta(minutes=5)
+    assert not _timestamps_equal(pd.DatetimeIndex(regular.tolist()), pd.DatetimeIndex(shifted))
+    assert _timestamps_equal(pd.DatetimeIndex(regular.tolist()), regular)
+    assert _timestamps_equal(regular[:0], regular[:0])
+
+
 # Nu merge inca
-# def test_active_reactive_IDs():
+# def test_active_reactive_IDs(input_data):
 #     active_power_profile_copy = active_power_profile.copy(deep=True)
 #     active_power_profile_copy.rename(columns={3: 4})
 #     active_power_profile_copy.to_parquet(DATA_PATH / "active_power_profile_copy.parquet", engine="pyarrow")
 #     with pytest.raises(LoadIdsDoNotMatchError):
 #         ValidatePowerSystemSimulation(str(PATH_INPUT_NETWORK_DATA), str(PATH_META_DATA), str(PATH_EV_ACTIVE_POWER_PROFILE), str(DATA_PATH / "active_power_profile.parquet"), str(PATH_REACTIVE_POWER_PROFILE))
 
-# def test_graph_cycle():
+# def test_graph_cycle(input_data):
 #     input_data_copy = copy.deepcopy(input_data)
 #     input_data_copy["line"][8]["to_status"] = 1
-#     json_serialize_to_file(DATA_PATH / "input_data_copy.json", input_data_copy)
+#     json_serialize_to_file(tmp_path / "input_data_copy.json", input_data_copy)
 #     with pytest.raises(GraphCycleError):
-#         ValidatePowerSystemSimulation(str(DATA_PATH / "input_data_copy.json"), str(PATH_META_DATA), str(PATH_EV_ACTIVE_POWER_PROFILE))
+#         ValidatePowerSystemSimulation(str(tmp_path / "input_data_copy.json"), str(PATH_META_DATA), str(PATH_EV_ACTIVE_POWER_PROFILE))